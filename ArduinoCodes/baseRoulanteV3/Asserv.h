@@ -25,6 +25,8 @@ bool movementEnabaled = false;
 bool PIDEnabled = false;
 bool xyMove = false;
 bool xyMoveStop = false;
+bool pathMove = false;
+int pathIndex = -1;
 float xTarget=0;
 float yTarget=0;
 float angleTarget=0;
@@ -165,6 +167,8 @@ void computePID()
         }
         if(!speedSet)
             speed = vmax;
+        if(pathMove) //the speed profile is computed for the whole path
+            speed = targetSpeed;
     }
     else if(xyMove && distance == 0){
           if(maxRotationSpeed<targetSpeedRotation)
@@ -546,6 +550,9 @@ void goTo(float x, float y, float angle){
 
 struct PathPoint{
     float x,y,angle,speed;
+    PathPoint(){
+        x = y = angle = speed = 0;
+    }
     PathPoint(float _x, float _y, float _angle, float _speed){
         x = _x;
         y = _y;
@@ -554,19 +561,28 @@ struct PathPoint{
     }    
 };
 
+#define PATH_MAX_LENGTH 24
+#define PATH_PASSING_DISTANCE 5 //cm, next point targeted this close to a point the robot drives through
+PathPoint pathBuffer[PATH_MAX_LENGTH];
+int pathLength = 0;
+
 void followPath(PathPoint* path, int length){
     float angle = 0;
     for(int i=0; i<length;i++){
+        pathIndex = i;
         float x = path[i].x;
         float y = path[i].y;
         angle = path[i].angle;
         float _speed = path[i].speed;
+        bool stop = _speed == 0 || i == length-1; //points without speed are reached before going on
         //if(_speed>0.9f)
         //_speed = 0.9f;
         xyMove = true;
+        pathMove = !stop;
         xTarget = x;
         yTarget = y;
-        if(i==0){
+        angleTarget = angle;
+        if(i==0 || stop){
             startX = absoluteX;
             startY = absoluteY;
         }
@@ -584,17 +600,23 @@ void followPath(PathPoint* path, int length){
             remainingDist = sqrt(pow(absoluteX-xTarget,2)+pow(absoluteY-yTarget,2));
             executionLoop(false);
             //wait_ms(5);
-        }while(!mouvmentFinished && remainingDist > accelerationDistance+2);
+        }while(!mouvmentFinished && (stop || remainingDist > PATH_PASSING_DISTANCE));
+        if(emergencyStop)
+            break;
     }
+    pathMove = false;
     waitForMouvmentFinished();
     xyMove = false;
     Encodeurs_Reset();
-    float finalAngle = angle - absoluteAngle;
-    if(finalAngle>360) finalAngle -= 360;
-    if(finalAngle<-360) finalAngle += 360;
-    if(finalAngle>180) finalAngle = -360 + finalAngle;
-    if(finalAngle<-180) finalAngle = 360 + finalAngle;
-    turn(finalAngle);    
+    if(!emergencyStop){
+        float finalAngle = angle - absoluteAngle;
+        if(finalAngle>360) finalAngle -= 360;
+        if(finalAngle<-360) finalAngle += 360;
+        if(finalAngle>180) finalAngle = -360 + finalAngle;
+        if(finalAngle<-180) finalAngle = 360 + finalAngle;
+        turn(finalAngle);
+    }
+    pathIndex = -1;
 }
 
 float getSpeed(){
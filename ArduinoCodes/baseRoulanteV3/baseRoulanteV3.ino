@@ -232,16 +232,49 @@ void executeOrder(volatile boolean &readReady, char* readBuffer, volatile boolea
       }
     }
     else if(strstr(readBuffer, "move status")){
-      if(PIDEnabled) {
-        if(staticCount < staticMax)
-          sprintf(writeBuffer,"move running\r\n");
+      if(PIDEnabled || pathIndex >= 0) {
+        const char* state = staticCount < staticMax ? "running" : "stuck";
+        if(pathIndex >= 0)
+          sprintf(writeBuffer,"move %s %i\r\n", state, pathIndex); //index of the path point targeted
         else
-          sprintf(writeBuffer,"move stuck\r\n");
+          sprintf(writeBuffer,"move %s\r\n", state);
       }
       else
         sprintf(writeBuffer,"move finished\r\n");
       writeReady=true;
     }
+    else if(strstr(readBuffer, "move path")) { //points sent with "path add"
+      if(!launchBlocking)
+        waitForNonBlocking = true;
+      else {
+        exitFromBlocking = true;
+        sprintf(writeBuffer,"move OK\r\n");
+        writeReady=true;
+        if(!PIDEnabled && pathLength > 0){
+          cleanInputs();
+          emergencyStop = false;
+          followPath(pathBuffer, pathLength);
+          emergencyStop = false;
+          pathLength = 0;
+        }
+      }
+    }
+    else if(strstr(readBuffer, "path clear")){
+      pathLength = 0;
+      sprintf(writeBuffer,"path OK\r\n");
+      writeReady=true;
+    }
+    else if(strstr(readBuffer, "path add ")){ //absolute X, Y, Angle, speed
+      int i_xPos=0, i_yPos=0, i_Angle=0, i_vitesse=0;
+      sscanf(readBuffer, "path add %i %i %i %i", &i_xPos, &i_yPos, &i_Angle, &i_vitesse);
+      if(pathLength < PATH_MAX_LENGTH){
+        pathBuffer[pathLength++] = PathPoint((float)(i_xPos)/10.0f, (float)(i_yPos)/10.0f, (float)(i_Angle), (float)(i_vitesse)/10.0f);
+        sprintf(writeBuffer,"path OK\r\n");
+      }
+      else
+        sprintf(writeBuffer,"path full\r\n");
+      writeReady=true;
+    }
     else if(strstr(readBuffer, "speed get")){
       sprintf(writeBuffer,"speed %.1f\r\n",getSpeed());
       writeReady=true;
@@ -276,7 +309,7 @@ void executeOrder(volatile boolean &readReady, char* readBuffer, volatile boolea
       writeReady=true;
     }
     else if(strstr(readBuffer, "support Path")){
-      sprintf(writeBuffer,"support 0\r\n");
+      sprintf(writeBuffer,"support 1\r\n");
       writeReady=true;
     }
     else if(!waitForNonBlocking){
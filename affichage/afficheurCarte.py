@@ -1,9 +1,9 @@
-from cartographie.lecteurCarte import LecteurCarte
+from cartographie.depotCartes import depot
 from affichage.fenetre import Fenetre
 
 class AfficheurCarte:
     def __init__(self,fichier = None,listePointInteret = None, ratio = 0.25, offset = 0):
-        self.carte = LecteurCarte(fichier,0)
+        self.carte = depot.getCarte(fichier)
         self.fond = self.carte.getFond()
         dimension = self.carte.getTaille()
         self.fenetre = Fenetre(dimension[0], dimension[1],ratio, offset)
@@ -0,0 +1,208 @@
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+import numpy
+
+from cartographie.depotCartes import depot
+from cartographie.chercheurChemin import ChercheurChemin, ModeRecherche, TypeGraph
+
+# Headless pathfinding benchmark: every map of cartes/ for every robot width of robots/, graph build and cache load
+# times, then a fixed seeded set of random and access zone to access zone queries for each search mode and graph.
+# Run from the repository root:
+#   python benchChemin.py -o bench.json                 report as JSON
+#   python benchChemin.py -g grid:40,grid:10,quadtree:10   compare the fixed grid with the quadtree
+#   python benchChemin.py --baseline bench.json         compare with a stored report, exit code 1 on regression
+# The graph cache is written to a temporary directory, the one of the repository is not used.
+
+SEED = 2019
+MARGE = 100  # mm, random points are drawn this far from the borders
+GRAPHES = {"node": TypeGraph.NOEUD, "grid": TypeGraph.GRILLE, "quadtree": TypeGraph.QUADTREE}
+GRAPHE_DEFAUT = "grid:40"  # graph of the reports written before the graph option
+
+
+def lireLargeurs(fichiers):
+    largeurs = set()
+    for fichier in fichiers:
+        try:
+            largeurs.add(int(float(ET.parse(fichier).getroot().get("rayon"))))
+        except (ET.ParseError, TypeError, ValueError) as e:
+            print fichier, "can't be read:", e
+    return sorted(largeurs)
+
+
+def lireCarte(fichier, largeur):
+    # only the errors of the map file are caught, the ones of the benchmark itself go up
+    try:
+        carte = depot.getCarte(fichier)
+        if carte is None:
+            raise ValueError("no such file")
+        return carte, carte.nouvellePartie(largeur)
+    except (ET.ParseError, TypeError, ValueError) as e:
+        print fichier, "can't be read:", e
+        return None, None
+
+
+def percentiles(durees):
+    if not durees:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = numpy.percentile(durees, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+def genererRequetes(chercheur, listePointInteret, requetes):
+    random.seed(SEED)
+    aleatoires = []
+    for i in range(0, requetes):
+        aleatoires.append((random.randint(MARGE, chercheur.largeur - MARGE), random.randint(MARGE, chercheur.longueur - MARGE),
+                           random.randint(MARGE, chercheur.largeur - MARGE), random.randint(MARGE, chercheur.longueur - MARGE)))
+    acces = [(point.zoneAcces.x, point.zoneAcces.y) for point in listePointInteret if point.zoneAcces is not None]
+    paires = [(a[0], a[1], b[0], b[1]) for i, a in enumerate(acces) for b in acces[i + 1:]]
+    if len(paires) > requetes:
+        paires = random.sample(paires, requetes)
+    return {"random": aleatoires, "access": paires}
+
+
+def mesurer(chercheur, listePointInteret, requetes):
+    durees = []
+    longueurs = []
+    points = []
+    echecs = 0
+    for x1, y1, x2, y2 in requetes:
+        t = time.time()
+        chemin = chercheur.calculerChemin(x1, y1, x2, y2, listePointInteret)
+        durees.append((time.time() - t) * 1000.0)
+        if chemin:
+            longueurs.append(sum([ligne.getlongeur() for ligne in chemin]))
+            points.append(len(chemin) + 1)
+        else:
+            echecs += 1
+    resultat = {"queries": len(requetes), "failed": echecs, "latencyMs": percentiles(durees),
+                "meanMs": float(numpy.mean(durees)) if durees else None,
+                "length": float(numpy.mean(longueurs)) if longueurs else None,
+                "waypoints": float(numpy.mean(points)) if points else None}
+    return resultat
+
+
+def mesurerCarte(carte, listePointInteret, fichier, largeur, modes, requetes, graphe=GRAPHE_DEFAUT):
+    nom, step = graphe.split(":")
+    parametres = {"typeGraph": GRAPHES[nom], "step": int(step), "largeurRobot": largeur}
+    t = time.time()
+    ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, **parametres)
+    construction = time.time() - t
+    t = time.time()
+    chercheur = ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, **parametres)
+    chargement = time.time() - t
+    resultat = {"map": os.path.basename(fichier), "width": largeur, "graph": graphe, "nodes": len(chercheur.graph.getNoeuds()),
+                "buildS": construction, "cacheLoadS": chargement, "modes": {}}
+    listeRequetes = genererRequetes(chercheur, listePointInteret, requetes)
+    for mode in modes:
+        chercheur.modeRecherche = mode
+        resultat["modes"][ModeRecherche.nom(mode)] = dict((nom, mesurer(chercheur, listePointInteret, liste))
+                                                          for nom, liste in listeRequetes.items())
+    return resultat
+
+
+def comparer(rapport, reference, tolerance):
+    # latencies and build times may grow by the tolerance, path lengths by 1%, failures not at all
+    anciens = dict(((r["map"], r["width"], r.get("graph", GRAPHE_DEFAUT)), r) for r in reference["results"])
+    regressions = []
+
+    def verifier(nom, valeur, ancienne, marge):
+        if valeur is not None and ancienne is not None and valeur > ancienne * (1.0 + marge) + 1e-9:
+            regressions.append("{}: {:.3f} -> {:.3f}".format(nom, ancienne, valeur))
+
+    for resultat in rapport["results"]:
+        ancien = anciens.get((resultat["map"], resultat["width"], resultat["graph"]))
+        if ancien is None:
+            continue
+        cle = "{} {} {}".format(resultat["map"], resultat["width"], resultat["graph"])
+        verifier(cle + " build s", resultat["buildS"], ancien["buildS"], tolerance)
+        verifier(cle + " cache load s", resultat["cacheLoadS"], ancien["cacheLoadS"], tolerance)
+        for mode, groupes in resultat["modes"].items():
+            for groupe, mesure in groupes.items():
+                ancienneMesure = ancien["modes"].get(mode, {}).get(groupe)
+                if ancienneMesure is None:
+                    continue
+                nom = "{} {} {}".format(cle, mode, groupe)
+                for p in ["p50", "p95", "p99"]:
+                    verifier(nom + " " + p + " ms", mesure["latencyMs"][p], ancienneMesure["latencyMs"][p], tolerance)
+                verifier(nom + " length", mesure["length"], ancienneMesure["length"], 0.01)
+                verifier(nom + " failed", mesure["failed"], ancienneMesure["failed"], 0.0)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pathfinding benchmark over every map and robot width")
+    parser.add_argument("-o", "--output", help="JSON report file, printed when missing")
+    parser.add_argument("-b", "--baseline", help="JSON report to compare with")
+    parser.add_argument("-n", "--requetes", type=int, default=50, help="queries of each kind per map and width")
+    parser.add_argument("-m", "--modes", default="bfs,astar,theta", help="search modes, among bfs,astar,theta,time")
+    parser.add_argument("-g", "--graphes", default=GRAPHE_DEFAUT, help="graphs as type:step, types among node,grid,quadtree")
+    parser.add_argument("-t", "--tolerance", type=float, default=0.2, help="allowed relative growth of the timings")
+    parser.add_argument("--cartes", default="cartes/*.xml")
+    parser.add_argument("--robots", default="robots/*.xml")
+    arguments = parser.parse_args()
+
+    noms = [ModeRecherche.nom(mode) for mode in range(0, 4)]
+    modes = [noms.index(nom) for nom in arguments.modes.split(",")]
+    fichiers = [os.path.abspath(fichier) for fichier in sorted(glob.glob(arguments.cartes))]
+    largeurs = lireLargeurs(sorted(glob.glob(arguments.robots)))
+    graphes = arguments.graphes.split(",")
+    for graphe in graphes:
+        if graphe.split(":")[0] not in GRAPHES or not graphe.partition(":")[2].isdigit():
+            parser.error("unknown graph " + graphe)
+
+    dossier = os.getcwd()
+    cache = tempfile.mkdtemp()
+    os.chdir(cache)
+    rapport = {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "seed": SEED, "queries": arguments.requetes,
+               "machine": " ".join(os.uname()), "results": []}
+    try:
+        for fichier in fichiers:
+            for largeur in largeurs:
+                carte, listePointInteret = lireCarte(fichier, largeur)
+                if carte is None:
+                    break
+                for graphe in graphes:
+                    rapport["results"].append(mesurerCarte(carte, listePointInteret, fichier, largeur, modes, arguments.requetes, graphe))
+    finally:
+        os.chdir(dossier)
+        shutil.rmtree(cache, True)
+
+    print "\n{:<28} {:>5} {:<11} {:>7} {:>8} {:>8} {:<6} {:<6} {:>8} {:>8} {:>8} {:>8} {:>6}".format(
+        "map", "width", "graph", "nodes", "build s", "load s", "mode", "kind", "p50 ms", "p95 ms", "p99 ms", "length", "points")
+    for resultat in rapport["results"]:
+        for mode, groupes in sorted(resultat["modes"].items()):
+            for groupe, mesure in sorted(groupes.items()):
+                latence = mesure["latencyMs"]
+                print "{:<28} {:>5} {:<11} {:>7} {:>8.3f} {:>8.3f} {:<6} {:<6} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.0f} {:>6.1f}".format(
+                    resultat["map"], resultat["width"], resultat["graph"], resultat["nodes"], resultat["buildS"], resultat["cacheLoadS"],
+                    mode, groupe, latence["p50"] or 0, latence["p95"] or 0, latence["p99"] or 0,
+                    mesure["length"] or 0, mesure["waypoints"] or 0)
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(rapport, file, indent=2, sort_keys=True)
+    else:
+        print json.dumps(rapport, indent=2, sort_keys=True)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = comparer(rapport, json.load(file), arguments.tolerance)
+        for regression in regressions:
+            print "REGRESSION", regression
+        print "{} regression(s) against {}".format(len(regressions), arguments.baseline)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import math
+import random
+import timeit
+
+import numpy
+
+from cartographie.ligne import Ligne
+from cartographie.cercle import Cercle
+from cartographie.rectangle import Rectangle
+from cartographie.polygone import Polygone
+from cartographie.collison import Collision
+
+# Micro-benchmark of the circle collision kernels against the previous chord approximation.
+# Run from the repository root: python benchCollision.py. The randomized check is verifierCollision.py
+
+
+class CollisionCordes(Collision):
+    # Previous implementation, kept here as the reference
+
+    def collisionCercleLigne(self,cercle,ligne):
+        listeLigne = []
+        nbrect = 8
+        x = cercle.x + cercle.rayon *1.*math.sin(0)
+        y = cercle.y + cercle.rayon *1. *math.cos(0)
+        for i in numpy.arange(0,math.pi*2,math.pi/(nbrect+1)*2):
+            x1 = cercle.x + cercle.rayon *1.*math.sin(i)
+            y1 = cercle.y + cercle.rayon *1. *math.cos(i)
+            listeLigne.append(Ligne("", x, y, x1, y1, "red"))
+            x = x1
+            y = y1
+        x1 = cercle.x + cercle.rayon *1.*math.sin(0)
+        y1 = cercle.y + cercle.rayon *1. *math.cos(0)
+        listeLigne.append(Ligne("", x, y, x1, y1, "red"))
+        for ligne1 in listeLigne:
+            if self.collisionLigneLigne(ligne1,ligne):
+                return True
+        return False
+
+    def collisionCercleRectangle(self,cercle,rectangle):
+        listCote = []
+        listCote.append(Ligne("haut", rectangle.x1, rectangle.y1, rectangle.x2, rectangle.y1, "black"))
+        listCote.append(Ligne("bas", rectangle.x1, rectangle.y2, rectangle.x2, rectangle.y2, "black"))
+        listCote.append(Ligne("gauche", rectangle.x1, rectangle.y1, rectangle.x1, rectangle.y2, "black"))
+        listCote.append(Ligne("droite", rectangle.x2, rectangle.y1, rectangle.x2, rectangle.y2, "black"))
+        listeRect = []
+        nbrect = 7
+        for i in numpy.arange(0, math.pi, math.pi / (nbrect + 1)):
+            x = cercle.rayon * 1. * math.sin(i)
+            y = cercle.rayon * 1. * math.cos(i)
+            listeRect.append(Rectangle("", cercle.x - x, cercle.y - y, cercle.x + x, cercle.y + y, "red"))
+        for cote in listCote:
+            for rect in listeRect:
+                if self.collisionRectangleLigne(rect,cote):
+                    return True
+        return False
+
+    def collisionPolygoneCercle(self, polygone, cercle):
+        lastPoint = polygone.pointList[-1]
+        for point in polygone.pointList:
+            currentLine = Ligne("", float(point["x"]), float(point["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
+            if self.collisionLigneCercle(currentLine, cercle):
+                return True
+            lastPoint = point
+        return False
+
+
+def cercleAleatoire():
+    return Cercle("", random.uniform(500, 2500), random.uniform(500, 1500), random.uniform(20, 400))
+
+
+def ligneAleatoire():
+    x = random.uniform(0, 3000)
+    y = random.uniform(0, 2000)
+    return Ligne("", x, y, x + random.uniform(-800, 800), y + random.uniform(-800, 800))
+
+
+def rectangleAleatoire():
+    x = random.uniform(0, 3000)
+    y = random.uniform(0, 2000)
+    return Rectangle("", x, y, x + random.uniform(10, 600), y + random.uniform(10, 600))
+
+
+def polygoneAleatoire(cx=None, cy=None):
+    # star shaped, possibly non convex
+    polygone = Polygone("")
+    if cx is None:
+        cx = random.uniform(300, 2700)
+        cy = random.uniform(300, 1700)
+    nbPoints = random.randint(3, 9)
+    for i in range(0, nbPoints):
+        angle = 2 * math.pi * i / nbPoints
+        rayon = random.uniform(50, 400)
+        polygone.addPoint(cx + rayon * math.cos(angle), cy + rayon * math.sin(angle))
+    return polygone
+
+
+def mesurer(collision, forme1, forme2, nombre=2000):
+    # the kernel itself, collisionEntre would stop on the bounding boxes first
+    noyau = getattr(collision, "collision" + forme1.__class__.__name__ + forme2.__class__.__name__)
+    duree = timeit.timeit(lambda: noyau(forme1, forme2), number=nombre)
+    return duree / nombre * 1e6
+
+
+def main():
+    random.seed(2019)
+    exact = Collision()
+    cordes = CollisionCordes()
+    print "Micro-benchmark (us per call, chords -> exact)"
+    cercle = Cercle("", 1500, 1000, 200)
+    for nom, forme in [("Ligne", Ligne("", 1000, 700, 2000, 1250)),
+                       ("Rectangle", Rectangle("", 1650, 1150, 1900, 1400)),
+                       ("Polygone", polygoneAleatoire(1750, 1000))]:
+        print "  Cercle/{}: {:.1f} -> {:.1f}".format(nom, mesurer(cordes, cercle, forme), mesurer(exact, cercle, forme))
+
+
+if __name__ == "__main__":
+    main()
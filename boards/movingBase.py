@@ -1,6 +1,8 @@
 from boards.board import Board
 import time
 
+PATH_MAX_LENGTH = 24  # points stored by the base, see baseRoulanteV3
+
 
 class MovingBase(Board):
 
@@ -113,6 +115,7 @@ class MovingBase(Board):
                 print "retry getMovementStatus("+status+")"
                 return self.getMovementStatus()
             return status.split(" ")[1]
+        return "disconnected"
 
     def getSpeed(self):
         if self.isConnected():
@@ -177,19 +180,53 @@ class MovingBase(Board):
         return self._isPathSupported
 
     def startMovementPath(self, pathArray):
+        # the points are sent one by one, a whole path doesn't fit in the I2C and serial buffers of the base
         if self.isConnected():
-            if self.isPathSupported():
-                command = "move setPath {}|".format(len(pathArray))
-                for move in pathArray:
-                    command += "{};{};{};{}|".format(move.x,move.y,move.angle, move.speed)
-                self.sendMessage(command + "\r\n")
-                echo = ""
-                echo = self.receiveMessage()  # "move OK"
-                if "move OK" not in echo:  # if ERROR is received, retry
-                    time.sleep(0.1)
-                    print "retry startMovementPath("+echo+")"
-                    return self.startMovementPath(pathArray)
-                return True
-            else:
-                print("ERROR: XY move not supported")
-                return False
\ No newline at end of file
+            if not self.isPathSupported():
+                print("ERROR: Path move not supported")
+                return False
+            if len(pathArray) > PATH_MAX_LENGTH:
+                print("ERROR: Path too long ({} points)".format(len(pathArray)))
+                return False
+            self.sendPathMessage("path clear\r\n")
+            for move in pathArray:
+                if not self.sendPathMessage("path add {:.0f} {:.0f} {:.0f} {:.0f}\r\n".format(move.x, move.y, move.angle, move.speed*10.0)):
+                    print("ERROR: Path buffer of the base full")
+                    return False
+            self.sendMessage("move path\r\n")
+            echo = ""
+            echo = self.receiveMessage()  # "move OK"
+            if "move OK" not in echo:  # if ERROR is received, retry
+                time.sleep(0.1)
+                print "retry startMovementPath("+echo+")"
+                return self.startMovementPath(pathArray)
+            return True
+
+    def sendPathMessage(self, message):
+        self.sendMessage(message)
+        echo = ""
+        echo = self.receiveMessage()  # "path OK" or "path full"
+        if "path full" in echo:
+            return False
+        if "path OK" not in echo:  # if ERROR is received, retry
+            time.sleep(0.1)
+            print "retry sendPathMessage("+echo+")"
+            return self.sendPathMessage(message)
+        return True
+
+    def getMovementPathStatus(self):
+        # status and index of the point the base is driving to, in one call
+        if self.isConnected():
+            self.sendMessage("move status\r\n")
+            status = ""
+            status = self.receiveMessage()  # "move running 3" "move stuck 3" "move finished"
+            if "move" not in status:  # if ERROR is received, retry
+                time.sleep(0.1)
+                print "retry getMovementPathStatus("+status+")"
+                return self.getMovementPathStatus()
+            values = status.split(" ")
+            index = None
+            if len(values) > 2:
+                index = int(values[2])
+            return values[1], index
+        return "disconnected", None
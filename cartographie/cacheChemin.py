@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+from cartographie.ligne import Ligne
+
+
+# LRU cache of the paths found by ChercheurChemin.trouverChemin.
+# Start and end are quantised to `quantum` mm, the key also holds the map version, the search mode and the
+# list of elements the path was computed against: any change of the map makes the previous entries unreachable,
+# they are dropped as soon as the version changes.
+class CacheChemin:
+
+    def __init__(self, taille=64, quantum=5):
+        self.taille = taille
+        self.quantum = float(quantum)
+        self.chemins = OrderedDict()
+        self.version = None
+        self.succes = 0
+        self.echecs = 0
+
+    def getCle(self, x1, y1, x2, y2, listePointInteret, version, mode, angles=None):
+        if version != self.version:
+            self.vider()
+            self.version = version
+        q = self.quantum
+        return (int(round(x1 / q)), int(round(y1 / q)), int(round(x2 / q)), int(round(y2 / q)),
+                mode, angles, frozenset(listePointInteret))
+
+    def chercher(self, cle, x1, y1, x2, y2):
+        if cle not in self.chemins:
+            self.echecs += 1
+            return False, None
+        segments = self.chemins.pop(cle)
+        self.chemins[cle] = segments  # most recently used at the end
+        self.succes += 1
+        if not segments:
+            return True, None if segments is None else []
+        # fresh Ligne objects, the exact start and end replace the quantised ones
+        listChemin = [Ligne("", s[0], s[1], s[2], s[3]) for s in segments]
+        listChemin[0] = Ligne("", x1, y1, listChemin[0].x2, listChemin[0].y2)
+        listChemin[-1] = Ligne("", listChemin[-1].x1, listChemin[-1].y1, x2, y2)
+        return True, listChemin
+
+    def ajouter(self, cle, listChemin):
+        segments = None
+        if listChemin is not None:
+            segments = [(ligne.x1, ligne.y1, ligne.x2, ligne.y2) for ligne in listChemin]
+        self.chemins[cle] = segments
+        while len(self.chemins) > self.taille:
+            self.chemins.popitem(last=False)
+
+    def vider(self):
+        self.chemins.clear()
+
+    def getStatistiques(self):
+        total = self.succes + self.echecs
+        return {"succes": self.succes, "echecs": self.echecs, "taille": len(self.chemins),
+                "ratio": float(self.succes) / total if total else 0.0}
@@ -0,0 +1,82 @@
+import os
+import struct
+
+import numpy
+
+# Binary graph cache, read back with numpy.memmap (no parsing).
+# Layout: header, then xs, ys, indptr, indices (int32), masque (uint8), element ids (S8), then the distance field
+# of the avoidance zones: its element ids (S8) and one float32 row per element, each section starting on an 8 bytes
+# boundary.
+MAGIC = "IAGRAPH\0"
+VERSION = 3  # 2: avoidance polygons from decalerPolygone, 3: distance field rows
+HEADER = struct.Struct("<8sIIfIIIIII32s")
+
+
+def aligner(offset):
+    return (offset + 7) & ~7
+
+
+class CacheGraph:
+
+    def __init__(self, fichier):
+        self.fichier = fichier
+
+    def getSections(self, nbNoeuds, nbAretes, nbOctets, nbElements, nbLignesChamp, nbCasesChamp):
+        sections = [("xs", numpy.int32, (nbNoeuds,)),
+                    ("ys", numpy.int32, (nbNoeuds,)),
+                    ("indptr", numpy.int32, (nbNoeuds + 1,)),
+                    ("indices", numpy.int32, (nbAretes,)),
+                    ("masque", numpy.uint8, (nbNoeuds, nbOctets)),
+                    ("elements", "S8", (nbElements,)),
+                    ("champElements", "S8", (nbLignesChamp,)),
+                    ("champ", numpy.float32, (nbLignesChamp, nbCasesChamp))]
+        offset = aligner(HEADER.size)
+        listeSections = []
+        for nom, dtype, shape in sections:
+            taille = numpy.dtype(dtype).itemsize * int(numpy.prod(shape))
+            listeSections.append((nom, dtype, shape, offset))
+            offset = aligner(offset + taille)
+        return listeSections
+
+    def sauvegarder(self, mapHash, largeurRobot, step, cache):
+        dossier = os.path.dirname(self.fichier)
+        if dossier and not os.path.isdir(dossier):
+            os.makedirs(dossier)
+        nbNoeuds = len(cache["xs"])
+        nbAretes = len(cache["indices"])
+        nbOctets = cache["masque"].shape[1]
+        nbElements = len(cache["elements"])
+        nbLignesChamp, nbCasesChamp = cache["champ"].shape
+        header = HEADER.pack(MAGIC, VERSION, step, largeurRobot, nbNoeuds, nbAretes, nbOctets, nbElements,
+                             nbLignesChamp, nbCasesChamp, mapHash)
+        tmpFichier = self.fichier + ".tmp"
+        with open(tmpFichier, "wb") as file:
+            file.write(header)
+            for nom, dtype, shape, offset in self.getSections(nbNoeuds, nbAretes, nbOctets, nbElements, nbLignesChamp, nbCasesChamp):
+                file.write("\0" * (offset - file.tell()))
+                file.write(numpy.ascontiguousarray(cache[nom], dtype=dtype).tostring())
+        if os.path.isfile(self.fichier):
+            os.remove(self.fichier)
+        os.rename(tmpFichier, self.fichier)  # never leave a truncated cache behind
+        return True
+
+    def charger(self, mapHash, largeurRobot, step):
+        if not os.path.isfile(self.fichier):
+            return None
+        with open(self.fichier, "rb") as file:
+            data = file.read(HEADER.size)
+        if len(data) != HEADER.size:
+            return None
+        magic, version, _step, _largeurRobot, nbNoeuds, nbAretes, nbOctets, nbElements, nbLignesChamp, nbCasesChamp, _mapHash = HEADER.unpack(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        if _mapHash != mapHash or _step != step or _largeurRobot != numpy.float32(largeurRobot):
+            return None
+        cache = {"step": _step}
+        for nom, dtype, shape, offset in self.getSections(nbNoeuds, nbAretes, nbOctets, nbElements, nbLignesChamp, nbCasesChamp):
+            if numpy.prod(shape) == 0:
+                cache[nom] = numpy.zeros(shape, dtype=dtype)
+            else:
+                # copy on write: pages are only duplicated if the graph is modified during the match
+                cache[nom] = numpy.memmap(self.fichier, dtype=dtype, mode="c", offset=offset, shape=shape)
+        return cache
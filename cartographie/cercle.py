@@ -9,6 +9,10 @@ class Cercle(Forme):
         self.y = y
         self.rayon = rayon
         self.couleur = couleur
+        self.calculerBoite()
+
+    def calculerBoite(self):
+        self.boite = (self.x - self.rayon, self.y - self.rayon, self.x + self.rayon, self.y + self.rayon)
 
     def setCouleur(self,newCouleur):
         couleur = newCouleur
@@ -0,0 +1,164 @@
+import math
+
+import numpy
+
+from cartographie.cercle import Cercle
+from cartographie.rectangle import Rectangle
+from cartographie.polygone import Polygone
+
+PAS_CHAMP = 20  # mm, between two cells of the field
+LOIN = 1e6  # mm, clearance of a cell when no avoidance zone is left
+
+
+def distanceForme(forme, xs, ys):
+    # Signed distance from each point to the border of the shape, negative inside
+    if isinstance(forme, Cercle):
+        return numpy.hypot(xs - forme.x, ys - forme.y) - forme.rayon
+    if isinstance(forme, Rectangle):
+        dx = numpy.maximum(min(forme.x1, forme.x2) - xs, xs - max(forme.x1, forme.x2))
+        dy = numpy.maximum(min(forme.y1, forme.y2) - ys, ys - max(forme.y1, forme.y2))
+        return numpy.hypot(numpy.maximum(dx, 0), numpy.maximum(dy, 0)) + numpy.minimum(numpy.maximum(dx, dy), 0)
+    if isinstance(forme, Polygone) and len(forme.pointList) > 2:
+        # distance to the closest edge, inside with the even-odd rule (same as tableObstacles.pointsContenus)
+        distance = numpy.full(len(xs), LOIN)
+        contenu = numpy.zeros(len(xs), dtype=bool)
+        points = forme.sommets.tolist()
+        for i in range(0, len(points)):
+            ax, ay = points[i - 1]
+            bx, by = points[i]
+            dx = bx - ax
+            dy = by - ay
+            longueurCarre = dx * dx + dy * dy
+            if longueurCarre > 0:
+                t = numpy.clip(((xs - ax) * dx + (ys - ay) * dy) / longueurCarre, 0.0, 1.0)
+                distance = numpy.minimum(distance, numpy.hypot(ax + t * dx - xs, ay + t * dy - ys))
+            if ay != by:
+                traverse = (ay > ys) != (by > ys)
+                contenu ^= traverse & (xs < ax + (ys - ay) * dx / dy)
+        return numpy.where(contenu, -distance, distance)
+    return numpy.full(len(xs), LOIN)
+
+
+# Signed distance field of the avoidance zones on a raster of the table: for each cell, how far the centre of the
+# robot is from the closest avoidance zone (0 on its border, negative inside). One row per element is kept, so the
+# elements removed during the match, the temporary obstacles and the elements the robot starts in can be left out
+# without computing the field again; the rows of the map are computed once and stored with the graph cache.
+class ChampDistance:
+
+    def __init__(self, largeur, longueur, listePointInteret=(), pas=PAS_CHAMP):
+        self.pas = float(pas)
+        self.nx = int(math.ceil(largeur / self.pas)) + 1
+        self.ny = int(math.ceil(longueur / self.pas)) + 1
+        ix, iy = numpy.meshgrid(numpy.arange(self.nx), numpy.arange(self.ny), indexing="ij")
+        self.xs = (ix * self.pas).ravel()
+        self.ys = (iy * self.pas).ravel()
+        self.elements = []
+        self.index = {}
+        self.actifs = []
+        self.distances = numpy.zeros((0, self.nx * self.ny), dtype=numpy.float32)
+        self._champCle = None
+        self._champ = None
+        lignes = []
+        for element in listePointInteret:
+            self.index[element] = len(self.elements)
+            self.elements.append(element)
+            self.actifs.append(True)
+            lignes.append(distanceForme(element.zoneEvitement.forme, self.xs, self.ys))
+        if lignes:
+            self.distances = numpy.array(lignes, dtype=numpy.float32)
+
+    def toCache(self):
+        return {"champ": self.distances, "champElements": [element.getID() for element in self.elements]}
+
+    def initFromCache(self, cache, listePointInteret):
+        # the stored rows must cover every element of the map on the same raster
+        if cache["champ"].shape != (len(cache["champElements"]), self.nx * self.ny):
+            return False
+        mapPointInteret = {}
+        for point in listePointInteret:
+            mapPointInteret[point.getID()] = point
+        elements = []
+        for idObject in cache["champElements"]:
+            if idObject not in mapPointInteret:
+                return False
+            elements.append(mapPointInteret[idObject])
+        if len(set(elements)) != len(listePointInteret):
+            return False
+        self.elements = elements
+        self.index = dict((element, index) for index, element in enumerate(elements))
+        self.actifs = [True] * len(elements)
+        self.distances = cache["champ"]
+        self._champCle = None
+        return True
+
+    def contient(self, element):
+        return element in self.index
+
+    def ajouter(self, element):
+        # the row of a known element is computed again in place, its shape may have moved
+        ligne = distanceForme(element.zoneEvitement.forme, self.xs, self.ys).astype(numpy.float32)
+        if element not in self.index:
+            self.index[element] = len(self.elements)
+            self.elements.append(element)
+            self.actifs.append(True)
+            self.distances = numpy.vstack([self.distances, ligne[None, :]])
+        else:
+            self.distances[self.index[element]] = ligne
+        self.actifs[self.index[element]] = True
+        self._champCle = None
+
+    def retirer(self, element):
+        if element in self.index:
+            self.actifs[self.index[element]] = False
+            self._champCle = None
+
+    def getChamp(self, ignores=()):
+        # (nx, ny) field of the active elements, without the ignored ones. The last one is kept, the search asks
+        # for the same field many times
+        indices = frozenset(self.index[element] for element in ignores if element in self.index)
+        if indices != self._champCle:
+            lignes = [i for i, actif in enumerate(self.actifs) if actif and i not in indices]
+            if lignes:
+                champ = self.distances[lignes].min(axis=0)
+            else:
+                champ = numpy.full(self.nx * self.ny, LOIN, dtype=numpy.float32)
+            self._champ = champ.reshape(self.nx, self.ny)
+            self._champCle = indices
+        return self._champ
+
+    def clearances(self, xs, ys, ignores=()):
+        # bilinear interpolation of the field at each point, points out of the table take the closest border cell
+        champ = self.getChamp(ignores)
+        fx = numpy.clip(numpy.asarray(xs, dtype=float) / self.pas, 0, self.nx - 1)
+        fy = numpy.clip(numpy.asarray(ys, dtype=float) / self.pas, 0, self.ny - 1)
+        ix = numpy.minimum(fx.astype(int), self.nx - 2)
+        iy = numpy.minimum(fy.astype(int), self.ny - 2)
+        fx -= ix
+        fy -= iy
+        return ((champ[ix, iy] * (1 - fx) + champ[ix + 1, iy] * fx) * (1 - fy) +
+                (champ[ix, iy + 1] * (1 - fx) + champ[ix + 1, iy + 1] * fx) * fy)
+
+    def clearanceAt(self, x, y, ignores=()):
+        champ = self.getChamp(ignores)
+        fx = min(max(x / self.pas, 0.0), self.nx - 1)
+        fy = min(max(y / self.pas, 0.0), self.ny - 1)
+        ix = min(int(fx), self.nx - 2)
+        iy = min(int(fy), self.ny - 2)
+        fx -= ix
+        fy -= iy
+        return float((champ[ix, iy] * (1 - fx) + champ[ix + 1, iy] * fx) * (1 - fy) +
+                     (champ[ix, iy + 1] * (1 - fx) + champ[ix + 1, iy + 1] * fx) * fy)
+
+    def clearanceLignes(self, x1, y1, x2, y2, ignores=()):
+        # smallest clearance along each segment, sampled every half cell
+        x1 = numpy.asarray(x1, dtype=float)[:, None]
+        y1 = numpy.asarray(y1, dtype=float)[:, None]
+        x2 = numpy.asarray(x2, dtype=float)[:, None]
+        y2 = numpy.asarray(y2, dtype=float)[:, None]
+        if x1.shape[0] == 0:
+            return numpy.zeros(0)
+        longueur = numpy.hypot(x2 - x1, y2 - y1).max()
+        t = numpy.linspace(0.0, 1.0, int(math.ceil(2 * longueur / self.pas)) + 1)
+        xs = x1 + (x2 - x1) * t
+        ys = y1 + (y2 - y1) * t
+        return self.clearances(xs.ravel(), ys.ravel(), ignores).reshape(xs.shape).min(axis=1)
@@ -1,74 +1,186 @@
-import copy
+import hashlib
+import heapq
+import math
 import time
-import pickle
-import sys
+import numpy
 import os
-import xml.etree.ElementTree as ET
 from collections import deque
 from cartographie.ligne import  Ligne
 from cartographie.collison import Collision
+from cartographie.cacheChemin import CacheChemin
+from cartographie.cacheGraph import CacheGraph
 from cartographie.graph import Graph
-from cartographie.noeud import Noeud
+from cartographie.grille import Grille
+from cartographie.quadtree import Quadtree
+from cartographie.indexSpatial import IndexSpatial, boiteEnglobante
+from cartographie.tableObstacles import TableObstacles, pointsContenus
+from cartographie.tableTrajets import TableTrajets, VITESSE_MOYENNE
+from cartographie.obstaclesDynamiques import ObstaclesDynamiques
+from cartographie.champDistance import ChampDistance
+
+SQRT2 = math.sqrt(2)
+INFINI = float("inf")
+FENETRE_SIMPLIFICATION = 16  # points tested at once from the current anchor by simplifierChemin
+VITESSE_ROTATION = 180.0  # deg/s, rotation speed of the robot on itself
+TEMPS_INVERSION = 0.3  # s, stopping and restarting when switching between forward and backward
+NB_CAPS = 16  # heading buckets of the time search
+DISTANCE_DEGAGEMENT = 100.0  # mm, a line closer than this to an avoidance zone costs more
+POIDS_DEGAGEMENT = 0.5  # extra cost of a line touching an avoidance zone, as a ratio of its length (0 disables it)
+
+
+def ecartAngle(angle1, angle2):
+    ecart = abs(angle1 - angle2) % 360.0
+    return min(ecart, 360.0 - ecart)
+
+
+class ModeRecherche:
+    (LARGEUR,
+     ASTAR,
+     THETA,
+     TEMPS
+    ) = range(4)
+
+    @staticmethod
+    def nom(mode):
+        return ["bfs", "astar", "theta", "time"][mode]
+
+
+class TypeGraph:
+    (NOEUD,
+     GRILLE,
+     QUADTREE
+    ) = range(3)
 
 
 class ChercheurChemin:
 
-    def __init__(self, dimensions, mapHash, listePointInteret, fenetre=None):
+    def __init__(self, dimensions, mapHash, listePointInteret, fenetre=None, modeRecherche=ModeRecherche.LARGEUR, typeGraph=TypeGraph.GRILLE, step=40, largeurRobot=0, construire=True):
         self.largeur = int(dimensions[0])
         self.longueur = int(dimensions[1])
         self.mapHash = mapHash
         self.listePointInteret = listePointInteret
         self.graph = Graph()
         self.fenetre = fenetre
-        self.step = 40
-        self.graphFile = "preComputedMap.graph"
+        self.step = step
+        self.typeGraph = typeGraph
+        self.modeRecherche = modeRecherche
+        self.statistiques = {"mode": modeRecherche, "expansions": 0, "duree": 0.0, "verifications": 0}
+        self.largeurRobot = largeurRobot
+        self.vitesse = VITESSE_MOYENNE
+        self.vitesseRotation = VITESSE_ROTATION
+        self.poidsDegagement = POIDS_DEGAGEMENT
+        self._penalitesCle = None
+        self._penalites = None
+        self.versionCarte = 0
+        self.cacheChemin = CacheChemin()
+        self.tableTrajets = None
+        self.obstaclesDynamiques = ObstaclesDynamiques(self)
+        self.graphFile = os.path.join("graphCache", "{}_{:.0f}_{}.bin".format(self.mapHash, self.largeurRobot, self.step))
         savedGraph = None
-        graphLoaded = False
+        self.graphCharge = False
+        self.trajetsCharges = False
         t = time.time()
-        if not self.loadGraph():
+        self.indexerCarte(self.listePointInteret)
+        if self.typeGraph == TypeGraph.QUADTREE:
+            # built from scratch in a few tens of milliseconds, leaf centres do not fit the integer cache
+            self.champDistance = ChampDistance(self.largeur, self.longueur, self.listePointInteret)
+            self.createGraph(self.listePointInteret)
+            print "Quadtree: {} nodes".format(self.graph.nbCellules)
+        elif self.loadGraph():
+            print "Graph loaded from file ("+self.mapHash+")"
+        elif not construire:
+            # the caller only accepts a precompiled map, it checks graphCharge
+            print "Graph file can't be used ("+self.graphFile+")"
+            self.champDistance = ChampDistance(self.largeur, self.longueur)
+        else:
             print "Graph file can't be used, need to compute it"
+            self.champDistance = ChampDistance(self.largeur, self.longueur, self.listePointInteret)
             self.createGraph(self.listePointInteret)
             self.saveGraph()
             print "Graph saved ("+self.mapHash+")"
-        else:
-            print "Graph loaded from file ("+self.mapHash+")"
         print "LoadTime: " + str(time.time() - t)
 
     def saveGraph(self):
-        file = open(self.graphFile, "w")
-        if file:
-            file.write(self.graph.serialize(self.mapHash))
-            return True
-        return False
+        cache = self.graph.toCache()
+        cache.update(self.champDistance.toCache())
+        try:
+            return CacheGraph(self.graphFile).sauvegarder(self.mapHash, self.largeurRobot, self.step, cache)
+        except (IOError, OSError) as e:
+            print "Can't write graph cache", self.graphFile, e
+            return False
 
     def loadGraph(self):
-        if not os.path.isfile(self.graphFile):
+        cache = CacheGraph(self.graphFile).charger(self.mapHash, self.largeurRobot, self.step)
+        if cache is None:
             return False
-        tree = ET.parse(self.graphFile)
-        root = tree.getroot()
-        if root.tag == "graph":
-            if root.get("hash") != self.mapHash:
-                return False
-            self.graph = Graph()
-            self.graph.initFromSerialization(root, self.listePointInteret)
+        if self.typeGraph == TypeGraph.GRILLE:
+            graph = Grille(self.largeur, self.longueur, self.step)
         else:
+            graph = Graph()
+        if not graph.initFromCache(cache, self.listePointInteret):
             return False
+        champDistance = ChampDistance(self.largeur, self.longueur)
+        if not champDistance.initFromCache(cache, self.listePointInteret):
+            return False
+        self.graph = graph
+        self.champDistance = champDistance
+        self.graphCharge = True
         return True
 
+    def exportGraph(self, fichier="preComputedMap.graph"):
+        file = open(fichier, "w")
+        if file:
+            file.write(self.graph.serialize(self.mapHash))
+            file.close()
+            return True
+        return False
+
     def createGraph(self, listePointInteret):
+        # Built in one process: the graphs are rasterised with numpy in a few tens of milliseconds (carte_2017: node
+        # graph 0.06 s, Grille 0.004 s at step 40 and 0.04 s at step 10), less than starting a process pool costs
+        self.versionCarte += 1
+        if self.typeGraph == TypeGraph.GRILLE:
+            self.graph = Grille(self.largeur, self.longueur, self.step)
+            self.graph.rasteriser(listePointInteret)
+            return
+        if self.typeGraph == TypeGraph.QUADTREE:
+            self.graph = Quadtree(self.largeur, self.longueur, self.step)
+            self.graph.rasteriser(listePointInteret)
+            return
         self.graph = Graph()
-        for x in range(0, self.largeur + 1, self.step):
-            for y in range(0, self.longueur + 1, self.step):
-                objects = self.pointContenuListe(x, y, listePointInteret)
-                newNoeud = Noeud(x,y)
-                newNoeud.colisionObject = objects
-                self.graph.addNoeud(newNoeud)
+        colonnes = range(0, self.largeur + 1, self.step)
+        lignes = range(0, self.longueur + 1, self.step)
+        # every node against every avoidance zone in one vectorized pass
+        contenu = self.pointsContenus(numpy.repeat(colonnes, len(lignes)), numpy.tile(lignes, len(colonnes)), listePointInteret)
+        i = 0
+        for x in colonnes:
+            for y in lignes:
+                self.graph.addNoeud(x, y, [listePointInteret[index] for index in numpy.nonzero(contenu[i])[0]])
+                i += 1
         self.graph.creerVoisins(self.step)
 
+    def indexerCarte(self, listePointInteret):
+        self.indexEvitement = IndexSpatial()
+        self.indexForme = IndexSpatial()
+        for point in listePointInteret:
+            self.indexEvitement.ajouter(point, point.zoneEvitement.forme)
+            self.indexForme.ajouter(point, point.forme)
+        self.tableEvitement = TableObstacles(listePointInteret)
+        self.tableForme = TableObstacles(listePointInteret, False)
+
     def enCollisionCarte(self,ligne,_listePointInteret, ignoreEvitmentZone=False):
+        table = self.tableForme if ignoreEvitmentZone else self.tableEvitement
+        resultat, touche = table.premiereCollision([ligne.x1], [ligne.y1], [ligne.x2], [ligne.y2], table.getMasque(_listePointInteret))
+        collision = resultat[0]
+        # elements unknown to the table (added after the map was loaded) are tested one by one
         tester = Collision(self.fenetre)
-        listePointInteret=sorted(_listePointInteret, key=lambda pointInteret : Ligne("",ligne.x1,ligne.y1,ligne.x1,ligne.y1).distanceAvec(pointInteret.forme))
+        listePointInteret = [point for point in _listePointInteret if not table.contient(point)]
+        if collision is not None:
+            listePointInteret.append(collision)
+        listePointInteret.sort(key=lambda pointInteret: math.hypot(pointInteret.forme.x - ligne.x1, pointInteret.forme.y - ligne.y1))
         for point in listePointInteret:
+            if point is collision:
+                return point
             if ignoreEvitmentZone:
                 if tester.collisionEntre(ligne, point.forme):
                     return point
@@ -77,49 +189,182 @@ class ChercheurChemin:
                     return point
         return False
 
-    def pointContenuDans(self,x,y,listePointInteret):
-        tester = Collision()
-        for element in listePointInteret:
-            if tester.contenuDans(x,y,element.zoneEvitement.forme):
-                return element
-        return None
+    def clearanceAt(self, x, y):
+        # distance from a position of the centre of the robot to the closest avoidance zone, negative inside
+        return self.champDistance.clearanceAt(x, y)
+
+    def getPenalites(self, blockingElements):
+        # extra cost ratio of each node of the graph, from its clearance. Kept while the map does not change
+        cle = (self.versionCarte, self.poidsDegagement, frozenset(blockingElements))
+        if cle != self._penalitesCle:
+            degagement = self.champDistance.clearances(self.graph.xs, self.graph.ys, blockingElements)
+            self._penalites = (self.poidsDegagement * numpy.clip(1.0 - degagement / DISTANCE_DEGAGEMENT, 0.0, 1.0)).tolist()
+            self._penalitesCle = cle
+        return self._penalites
+
+    def degagementActif(self):
+        # The breadth first search counts hops and can't weigh its nodes with the clearance penalty, so it keeps the
+        # shortest lines everywhere instead: the direct line and the shortcuts are not checked for clearance either
+        return self.poidsDegagement > 0 and self.modeRecherche != ModeRecherche.LARGEUR
+
+    def degagementSuffisant(self, ligne, ignores=()):
+        # a straight line going no closer to the avoidance zones than its ends, or than DISTANCE_DEGAGEMENT
+        if not self.degagementActif():
+            return True
+        champ = self.champDistance
+        degagement = champ.clearanceLignes([ligne.x1], [ligne.y1], [ligne.x2], [ligne.y2], ignores)[0]
+        requis = min(DISTANCE_DEGAGEMENT, champ.clearanceAt(ligne.x1, ligne.y1, ignores), champ.clearanceAt(ligne.x2, ligne.y2, ignores))
+        return degagement >= requis - champ.pas / 2
+
+    def candidatsPoint(self, x, y, listePointInteret):
+        candidats = self.indexEvitement.candidats(x, y, x, y)
+        return [element for element in listePointInteret if element in candidats or not self.indexEvitement.contient(element)]
+
+    def pointsContenus(self, xs, ys, listePointInteret):
+        # (N, len(listePointInteret)) mask of the avoidance zones holding each of the N points, in one vectorized pass
+        table = self.tableEvitement
+        contenu = table.contenus(xs, ys)
+        colonnes = numpy.array([table.index.get(element, 0) for element in listePointInteret], dtype=int)
+        resultat = contenu[:, colonnes]
+        for i, element in enumerate(listePointInteret):
+            if not table.contient(element):
+                resultat[:, i] = pointsContenus(element.zoneEvitement.forme, numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float))
+        return resultat
 
     def pointContenuListe(self,x,y,listePointInteret):
         tester = Collision()
         elementList = []
-        for element in listePointInteret:
+        for element in self.candidatsPoint(x, y, listePointInteret):
             if tester.contenuDans(x,y,element.zoneEvitement.forme):
                 elementList.append(element)
         return elementList
 
+    def retirerElement(self, element, permanent=True):
+        # Only the cells covered by the avoidance zone are updated, the tables are filtered by the callers lists.
+        # Temporary elements (dynamic obstacles) do not change the travel table
+        self.graph.retirerElement(element, boiteEnglobante(element.zoneEvitement.forme))
+        self.indexEvitement.retirer(element)
+        self.indexForme.retirer(element)
+        self.champDistance.retirer(element)
+        if permanent and self.tableTrajets is not None:
+            self.tableTrajets.retirerElement(element)
+        self.versionCarte += 1
+
+    def ajouterElement(self, element, permanent=True):
+        self.graph.ajouterElement(element, boiteEnglobante(element.zoneEvitement.forme))
+        self.indexEvitement.ajouter(element, element.zoneEvitement.forme)
+        self.indexForme.ajouter(element, element.forme)
+        self.tableEvitement.ajouter(element)
+        self.tableForme.ajouter(element)
+        self.champDistance.ajouter(element)
+        if self.tableTrajets is not None:
+            self.tableTrajets.suivreGraph()
+        if permanent and self.tableTrajets is not None:
+            self.tableTrajets.ajouterElement(element)
+        self.versionCarte += 1
+
+    def initialiserTrajets(self, listePosition, vitesse=VITESSE_MOYENNE, construire=True):
+        # Travel table between the access zones and the starting positions, cached next to the graph
+        t = time.time()
+        table = TableTrajets(self, vitesse)
+        for point in self.listePointInteret:
+            if point.zoneAcces is not None:
+                table.ajouterPoint(point.getID(), point.zoneAcces.x, point.zoneAcces.y)
+        for position in listePosition:
+            table.ajouterPoint(position.nom, position.x, position.y)
+        fichier = self.getFichierTrajets(listePosition)
+        self.trajetsCharges = table.charger(fichier, self.mapHash)
+        if self.trajetsCharges:
+            print "Travel table loaded from file"
+        elif not construire:
+            print "Travel table file can't be used ("+fichier+")"
+            return
+        else:
+            table.calculer()
+            try:
+                table.sauvegarder(fichier, self.mapHash)
+            except (IOError, OSError) as e:
+                print "Can't write travel table", fichier, e
+        print "Travel table: {} points in {:.3f}s".format(len(table.ids), time.time() - t)
+        self.tableTrajets = table
+
+    def getFichierTrajets(self, listePosition):
+        # robots of the same width share the graph, the table also depends on their starting positions
+        positions = ";".join(["{},{:.0f},{:.0f}".format(p.nom, p.x, p.y) for p in listePosition])
+        return os.path.splitext(self.graphFile)[0] + "_" + hashlib.md5(positions).hexdigest()[:8] + "_trajets.bin"
+
+    def getTrajet(self, x, y, element):
+        # (distance, duration) from a position to the access zone of an element, None when unknown
+        if self.tableTrajets is None or element.getID() not in self.tableTrajets.indexPoint:
+            return None
+        return self.tableTrajets.getTrajetDepuis(x, y, element.getID())
+
     def updateNodesRemovingElement(self, element, listePointInteret):
-        tmpList = list(listePointInteret)  # copy
-        tmpList.remove(element)
-        for key, noeud in self.graph.listeNoeud.iteritems():
-            if element in noeud.colisionObject:
-                noeud.colisionObject.remove(element)#line added during cup 2017
-                tester = Collision(self.fenetre)
-                line = Ligne("", noeud.x, noeud.y, noeud.x, noeud.y)
-                tmpList = sorted(tmpList,key=lambda pointInteret: line.distanceAvec(pointInteret.forme))
-                for point in listePointInteret:
-                    if tester.collisionEntre(line, point.zoneEvitement.forme):
-                        noeud.colisionObject = point
-                        break
+        self.retirerElement(element)
 
     def supprimerElementsContenant(self,x1,y1,x2,y2,listePointInteret):
         tester = Collision()
-        for element in listePointInteret:
+        for element in list(listePointInteret):
             if tester.contenuDans(x1,y1,element.zoneEvitement.forme):
-                self.updateNodesRemovingElement(element, listePointInteret)
+                self.retirerElement(element)
                 listePointInteret.remove(element)
             elif (x1 != x2 or y1 != y2) and tester.contenuDans(x2,y2,element.zoneEvitement.forme):
-                self.updateNodesRemovingElement(element, listePointInteret)
+                self.retirerElement(element)
                 listePointInteret.remove(element)
-        self.createGraph(self.listePointInteret)
 
 
 
-    def trouverChemin(self,x1,y1,x2,y2,_listePointInteret):
+    def ajouterObstacleDynamique(self, x, y, xRobot=None, yRobot=None):
+        return self.obstaclesDynamiques.ajouter(x, y, xRobot, yRobot)
+
+    def trouverChemin(self,x1,y1,x2,y2,_listePointInteret,angleDepart=None,angleArrivee=None):
+        self.obstaclesDynamiques.nettoyer()
+        if len(self.obstaclesDynamiques.obstacles) > 0:
+            _listePointInteret = _listePointInteret + self.obstaclesDynamiques.getElements()
+        angles = None
+        if self.modeRecherche == ModeRecherche.TEMPS:
+            angles = (angleDepart, angleArrivee)  # only the time search depends on the headings
+        cle = self.cacheChemin.getCle(x1, y1, x2, y2, _listePointInteret, self.versionCarte, self.modeRecherche, angles)
+        trouve, listChemin = self.cacheChemin.chercher(cle, x1, y1, x2, y2)
+        if trouve:
+            return listChemin
+        listChemin = self.calculerChemin(x1, y1, x2, y2, _listePointInteret, angleDepart, angleArrivee)
+        self.cacheChemin.ajouter(cle, listChemin)
+        return listChemin
+
+    def trouverCheminEstime(self,x1,y1,x2,y2,_listePointInteret,angleDepart=None,angleArrivee=None):
+        # The path and its estimated execution time in seconds
+        listChemin = self.trouverChemin(x1, y1, x2, y2, _listePointInteret, angleDepart, angleArrivee)
+        if listChemin is None:
+            return None, INFINI
+        return listChemin, self.estimerDuree(listChemin, angleDepart, angleArrivee)
+
+    def estimerDuree(self, listChemin, angleDepart=None, angleArrivee=None):
+        # Same behaviour as Robot.seDeplacerXY: turn towards each line, backward when it is behind the robot
+        duree = 0.0
+        cap = angleDepart
+        sens = 0
+        for ligne in listChemin:
+            longueur = ligne.getlongeur()
+            if longueur == 0:
+                continue
+            angle = ligne.getAngle()
+            nouveauSens = 1
+            if cap is not None and ecartAngle(cap, angle) > 90:
+                nouveauSens = -1
+                angle += 180
+            if cap is not None:
+                duree += ecartAngle(cap, angle) / self.vitesseRotation
+            if sens != 0 and nouveauSens != sens:
+                duree += TEMPS_INVERSION
+            duree += longueur / self.vitesse
+            cap = angle
+            sens = nouveauSens
+        if cap is not None and angleArrivee is not None:
+            duree += ecartAngle(cap, angleArrivee) / self.vitesseRotation
+        return duree
+
+    def calculerChemin(self,x1,y1,x2,y2,_listePointInteret,angleDepart=None,angleArrivee=None):
         self.graph.nettoyer()
         #Point contained in objects
         startElements = self.pointContenuListe(x1, y1, _listePointInteret)
@@ -128,38 +373,31 @@ class ChercheurChemin:
 
         notBlockingElements = list(set(_listePointInteret) - set(blockingElements))
         directLine = Ligne("", x1, y1, x2, y2)
-        if not self.enCollisionCarte(directLine, notBlockingElements):
+        directeLibre = not self.enCollisionCarte(directLine, notBlockingElements)
+        if directeLibre and self.degagementSuffisant(directLine, blockingElements):
             return [directLine]
-        elif self.fenetre:
+        elif not directeLibre and self.fenetre:
             directLine.setCouleur("violet")
             directLine.dessiner(self.fenetre)
 
-        startNode = self.graph.trouverPointProche(x1,y1)
-        endNode = self.graph.trouverPointProche(x2,y2)
+        startNode = self.graph.trouverPointProche(x1, y1, blockingElements)
+        endNode = self.graph.trouverPointProche(x2, y2, blockingElements)
         if startNode == None or endNode == None:
             print "Start or end node not found"
-            return None
-        listnoeud = deque()
-        listnoeud.append(startNode)
-        self.graph.marquer(startNode)
-
-        while len(listnoeud)>0:
-            currentNode = listnoeud.popleft()
-            if currentNode == endNode:
-                break
-            for noeud in self.graph.getVoisin(currentNode):
-                if not self.graph.estMaquer(noeud):
-                    addNode = True
-                    if len(noeud.colisionObject) != 0:
-                        for elem in noeud.colisionObject:
-                            if not elem in blockingElements:
-                                self.graph.marquer(noeud)
-                                addNode = False
-                                break
-                    if(addNode):
-                        self.graph.setPere(noeud, currentNode)
-                        self.graph.marquer(noeud)
-                        listnoeud.append(noeud)
+            return [directLine] if directeLibre else None
+        t = time.time()
+        if self.modeRecherche == ModeRecherche.ASTAR:
+            expansions = self.rechercheAStar(startNode, endNode, blockingElements)
+        elif self.modeRecherche == ModeRecherche.THETA:
+            expansions = self.rechercheTheta(startNode, endNode, blockingElements)
+        elif self.modeRecherche == ModeRecherche.TEMPS:
+            expansions = self.rechercheTemps(startNode, endNode, blockingElements, angleDepart, angleArrivee)
+        else:
+            expansions = self.rechercheLargeur(startNode, endNode, blockingElements)
+        self.statistiques["mode"] = self.modeRecherche
+        self.statistiques["expansions"] = expansions
+        self.statistiques["duree"] = time.time() - t
+        print "Search {}: {} expansions in {:.1f}ms".format(ModeRecherche.nom(self.modeRecherche), expansions, self.statistiques["duree"] * 1000.0)
 
         listPoint = []
         lastNode = endNode
@@ -170,17 +408,17 @@ class ChercheurChemin:
             #from endNode
             listPoint.append([x2, y2])
             #trip
-            listPoint.append([lastNode.x, lastNode.y])
-            listPoint.append([currentNode.x, currentNode.y])
+            listPoint.append(list(self.graph.getPosition(lastNode)))
+            listPoint.append(list(self.graph.getPosition(currentNode)))
             #to startNode
             listPoint.append([x1, y1])
         else:
             #from endNode
             listPoint.append([x2, y2])
-            listPoint.append([lastNode.x, lastNode.y])
+            listPoint.append(list(self.graph.getPosition(lastNode)))
             #trip
             while self.graph.getPere(currentNode) != None:
-                listPoint.append([currentNode.x, currentNode.y])
+                listPoint.append(list(self.graph.getPosition(currentNode)))
                 currentNode = self.graph.getPere(currentNode)
             # to startNode
             listPoint.append([x1, y1])
@@ -201,25 +439,332 @@ class ChercheurChemin:
             line = Ligne("", p1[0], p1[1], p2[0], p2[1])
             listChemin.append(line)
         print "Chemin len ", len(listChemin)
-        self.simplifierChemin(listChemin, tmpList)
-        print "Chemin Simplified len ", len(listChemin)
+        if not listChemin and directeLibre:
+            return [directLine]  # too close to the zones, but nothing better was found
+        brut = list(listChemin)
+        self.simplifierChemin(listChemin, tmpList, blockingElements)
+        if self.modeRecherche == ModeRecherche.TEMPS and listChemin:
+            # a shorter path is not always a faster one once the rotations are counted
+            if self.estimerDuree(brut, angleDepart, angleArrivee) < self.estimerDuree(listChemin, angleDepart, angleArrivee):
+                listChemin[:] = brut
+        print "Chemin Simplified len ", len(listChemin), "with", self.statistiques["verifications"], "collision checks"
 
         return listChemin
 
 
-    def simplifierChemin(self, tabchemin, listPointInteret):
-        i=-1
-        while i < len(tabchemin)-2:
-            i+=1
-            l1 = tabchemin[i]
-            l2 = tabchemin[i+1]
-            line = Ligne("",l1.x1, l1.y1, l2.x2, l2.y2, "")
-            #if self.fenetre:
-            #    line.setCouleur("red")
-            #    line.dessiner(self.fenetre)
-            if not self.enCollisionCarte(line,listPointInteret):
-                tabchemin.insert(i,line)
-                tabchemin.remove(l1)
-                tabchemin.remove(l2)
-                i=-1
+    def rechercheLargeur(self, startNode, endNode, blockingElements):
+        expansions = 0
+        listnoeud = deque()
+        listnoeud.append(startNode)
+        self.graph.marquer(startNode)
+
+        while len(listnoeud)>0:
+            currentNode = listnoeud.popleft()
+            expansions += 1
+            if currentNode == endNode:
+                break
+            for noeud in self.graph.getVoisin(currentNode):
+                if not self.graph.estMaquer(noeud):
+                    self.graph.marquer(noeud)
+                    if self.graph.estLibre(noeud, blockingElements):
+                        self.graph.setPere(noeud, currentNode)
+                        listnoeud.append(noeud)
+        return expansions
+
+    def heuristiqueOctile(self, noeud, endNode):
+        x1, y1 = self.graph.getPosition(noeud)
+        x2, y2 = self.graph.getPosition(endNode)
+        dx = abs(x1 - x2)
+        dy = abs(y1 - y2)
+        return dx + dy + (SQRT2 - 2) * min(dx, dy)
+
+    def heuristique(self, noeud, endNode):
+        # octile distance on the 8-connected grids. The edges of the quadtree join leaf centres in any direction and
+        # can be shorter than the octile distance, only the euclidean distance stays admissible there
+        if self.typeGraph != TypeGraph.QUADTREE:
+            return self.heuristiqueOctile(noeud, endNode)
+        x1, y1 = self.graph.getPosition(noeud)
+        x2, y2 = self.graph.getPosition(endNode)
+        return math.hypot(x1 - x2, y1 - y2)
+
+    def rechercheAStar(self, startNode, endNode, blockingElements):
+        # The graph holds the closed set (marquer) and the tree (setPere), g costs stay local to the query
+        expansions = 0
+        compteur = 0
+        penalites = self.getPenalites(blockingElements)
+        cout = {startNode: 0.0}
+        ouverts = [(self.heuristique(startNode, endNode), compteur, startNode)]
+        while len(ouverts) > 0:
+            f, c, currentNode = heapq.heappop(ouverts)
+            if self.graph.estMaquer(currentNode):
+                continue  # stale heap entry
+            self.graph.marquer(currentNode)
+            expansions += 1
+            if currentNode == endNode:
+                break
+            coutCourant = cout[currentNode]
+            xCourant, yCourant = self.graph.getPosition(currentNode)
+            for noeud in self.graph.getVoisin(currentNode):
+                if self.graph.estMaquer(noeud) or not self.graph.estLibre(noeud, blockingElements):
+                    continue
+                x, y = self.graph.getPosition(noeud)
+                nouveauCout = coutCourant + math.hypot(x - xCourant, y - yCourant) * (1.0 + (penalites[currentNode] + penalites[noeud]) / 2.0)
+                if nouveauCout < cout.get(noeud, INFINI):
+                    cout[noeud] = nouveauCout
+                    self.graph.setPere(noeud, currentNode)
+                    compteur += 1
+                    heapq.heappush(ouverts, (nouveauCout + self.heuristique(noeud, endNode), compteur, noeud))
+        return expansions
+
+    def ligneDeVue(self, noeud1, noeud2, blockingElements):
+        # Supercover walk of every grid cell crossed by the segment, all of them must be free
+        x1, y1 = self.graph.getPosition(noeud1)
+        x2, y2 = self.graph.getPosition(noeud2)
+        ix = int(round(float(x1) / self.graph.step))
+        iy = int(round(float(y1) / self.graph.step))
+        nx = int(round(float(x2) / self.graph.step)) - ix
+        ny = int(round(float(y2) / self.graph.step)) - iy
+        sx = 1 if nx > 0 else -1
+        sy = 1 if ny > 0 else -1
+        nx = abs(nx)
+        ny = abs(ny)
+        i = 0
+        j = 0
+        while i < nx or j < ny:
+            decision = (1 + 2 * i) * ny - (1 + 2 * j) * nx
+            if decision == 0:
+                # the segment goes exactly through a cell corner, both side cells are crossed
+                for case in [(ix + sx, iy), (ix, iy + sy)]:
+                    noeud = self.graph.getNoeudCase(case[0], case[1])
+                    if noeud is None or not self.graph.estLibre(noeud, blockingElements):
+                        return False
+                ix += sx
+                iy += sy
+                i += 1
+                j += 1
+            elif decision < 0:
+                ix += sx
+                i += 1
+            else:
+                iy += sy
+                j += 1
+            noeud = self.graph.getNoeudCase(ix, iy)
+            if noeud is None or not self.graph.estLibre(noeud, blockingElements):
+                return False
+        return True
+
+    def rechercheTheta(self, startNode, endNode, blockingElements):
+        # Lazy Theta*: a node takes the parent of the node that reaches it, so the pere chain is an any-angle path.
+        # The line of sight is only checked once the node is expanded, and repaired from its expanded neighbours if blocked
+        expansions = 0
+        compteur = 0
+        xFin, yFin = self.graph.getPosition(endNode)
+        penalites = self.getPenalites(blockingElements)
+        cout = {startNode: 0.0}
+        ouverts = [(0.0, compteur, startNode)]
+        while len(ouverts) > 0:
+            f, c, currentNode = heapq.heappop(ouverts)
+            if self.graph.estMaquer(currentNode):
+                continue  # stale heap entry
+            xCourant, yCourant = self.graph.getPosition(currentNode)
+            pere = self.graph.getPere(currentNode)
+            if pere is not None and not self.ligneDeVue(pere, currentNode, blockingElements):
+                meilleurCout = INFINI
+                for noeud in self.graph.getVoisin(currentNode):
+                    if self.graph.estMaquer(noeud):
+                        x, y = self.graph.getPosition(noeud)
+                        nouveauCout = cout[noeud] + math.hypot(x - xCourant, y - yCourant) * (1.0 + (penalites[noeud] + penalites[currentNode]) / 2.0)
+                        if nouveauCout < meilleurCout:
+                            meilleurCout = nouveauCout
+                            pere = noeud
+                cout[currentNode] = meilleurCout
+                self.graph.setPere(currentNode, pere)
+            self.graph.marquer(currentNode)
+            expansions += 1
+            if currentNode == endNode:
+                break
+            if pere is None:
+                pere = currentNode
+            xPere, yPere = self.graph.getPosition(pere)
+            for noeud in self.graph.getVoisin(currentNode):
+                if self.graph.estMaquer(noeud) or not self.graph.estLibre(noeud, blockingElements):
+                    continue
+                x, y = self.graph.getPosition(noeud)
+                nouveauCout = cout[pere] + math.hypot(x - xPere, y - yPere) * (1.0 + (penalites[pere] + penalites[noeud]) / 2.0)
+                if nouveauCout < cout.get(noeud, INFINI):
+                    cout[noeud] = nouveauCout
+                    self.graph.setPere(noeud, pere)
+                    compteur += 1
+                    heapq.heappush(ouverts, (nouveauCout + math.hypot(x - xFin, y - yFin), compteur, noeud))
+        return expansions
+
+    def rechercheTemps(self, startNode, endNode, blockingElements, angleDepart=None, angleArrivee=None):
+        # Lazy Theta* over (node, heading bucket) states. A straight line costs its length at self.vitesse,
+        # the rotation from the heading at its start at self.vitesseRotation, and TEMPS_INVERSION when the robot
+        # switches between forward and backward. Each state keeps its exact heading, the bucket only separates states.
+        # The direction is not part of the state: like Robot.seDeplacerXY, the robot only goes backward when the next
+        # point is behind it, so the direction follows from the heading and is kept next to it.
+        # Like the other searches, a line between nodes close to the avoidance zones costs more.
+        # The heuristic is the straight line at full speed
+        expansions = 0
+        compteur = 0
+        pas = 360.0 / NB_CAPS
+        xFin, yFin = self.graph.getPosition(endNode)
+        penalites = self.getPenalites(blockingElements)
+
+        def rotation(cap1, cap2):
+            if cap1 is None or cap2 is None:
+                return 0.0
+            return ecartAngle(cap1, cap2) / self.vitesseRotation
+
+        def ligne(etat, noeud):
+            # driving straight from a state to a node: (duration, heading, direction)
+            x1, y1 = self.graph.getPosition(etat[0])
+            x2, y2 = self.graph.getPosition(noeud)
+            sens, cap = 1, math.degrees(math.atan2(y2 - y1, x2 - x1))
+            capEtat = caps[etat]
+            if capEtat is not None and ecartAngle(capEtat, cap) > 90:
+                sens, cap = -1, cap + 180.0
+            duree = math.hypot(x2 - x1, y2 - y1) / self.vitesse * (1.0 + (penalites[etat[0]] + penalites[noeud]) / 2.0)
+            duree += rotation(capEtat, cap)
+            if sensEtat[etat] != 0 and sens != sensEtat[etat]:
+                duree += TEMPS_INVERSION
+            return duree, cap, sens
+
+        depart = (startNode, None)
+        caps = {depart: angleDepart}
+        sensEtat = {depart: 0}
+        cout = {depart: 0.0}
+        peres = {depart: None}
+        fermes = set()
+        fermesNoeud = {}
+        fin = None
+        ouverts = [(math.hypot(*[a - b for a, b in zip(self.graph.getPosition(startNode), (xFin, yFin))]) / self.vitesse, compteur, depart)]
+        while len(ouverts) > 0:
+            f, c, etat = heapq.heappop(ouverts)
+            if etat == "fin":
+                break
+            if etat in fermes:
+                continue  # stale heap entry
+            if self.estDomine(etat, cout, caps, sensEtat, fermesNoeud.get(etat[0], [])):
+                continue
+            pere = peres[etat]
+            if pere is not None and not self.ligneDeVue(pere[0], etat[0], blockingElements):
+                # repair from the expanded states of the neighbour nodes
+                meilleur = None
+                for noeud in self.graph.getVoisin(etat[0]):
+                    for etatVoisin in fermesNoeud.get(noeud, []):
+                        duree, cap, sens = ligne(etatVoisin, etat[0])
+                        if meilleur is None or cout[etatVoisin] + duree < meilleur[0]:
+                            meilleur = (cout[etatVoisin] + duree, etatVoisin, cap, sens)
+                if meilleur is None:
+                    continue
+                cout[etat], pere, caps[etat], sensEtat[etat] = meilleur
+                peres[etat] = pere
+            fermes.add(etat)
+            fermesNoeud.setdefault(etat[0], []).append(etat)
+            expansions += 1
+            if etat[0] == endNode:
+                total = cout[etat] + rotation(caps[etat], angleArrivee)
+                if fin is None or total < cout["fin"]:
+                    cout["fin"] = total
+                    fin = etat
+                    compteur += 1
+                    heapq.heappush(ouverts, (total, compteur, "fin"))
+                continue
+            # from the parent like Lazy Theta*, the line of sight is checked when the neighbour is expanded
+            sources = [etat] if pere is None else [pere]
+            for noeud in self.graph.getVoisin(etat[0]):
+                if not self.graph.estLibre(noeud, blockingElements):
+                    continue
+                x, y = self.graph.getPosition(noeud)
+                heuristique = math.hypot(xFin - x, yFin - y) / self.vitesse
+                for source in sources:
+                    duree, cap, sens = ligne(source, noeud)
+                    etatVoisin = (noeud, int(round(cap / pas)) % NB_CAPS)
+                    if etatVoisin in fermes:
+                        continue
+                    nouveauCout = cout[source] + duree
+                    if nouveauCout < cout.get(etatVoisin, INFINI):
+                        cout[etatVoisin] = nouveauCout
+                        caps[etatVoisin] = cap
+                        sensEtat[etatVoisin] = sens
+                        peres[etatVoisin] = source
+                        compteur += 1
+                        heapq.heappush(ouverts, (nouveauCout + heuristique, compteur, etatVoisin))
+        if fin is None:
+            return expansions
+        # the waypoints of the best state sequence become the pere chain read by calculerChemin
+        listeNoeud = []
+        etat = fin
+        while etat is not None:
+            noeud = etat[0]
+            if noeud in listeNoeud:
+                del listeNoeud[listeNoeud.index(noeud) + 1:]  # a node visited twice, the loop is useless
+            else:
+                listeNoeud.append(noeud)
+            etat = peres[etat]
+        for i in range(0, len(listeNoeud) - 1):
+            self.graph.setPere(listeNoeud[i], listeNoeud[i + 1])
+        self.statistiques["dureeEstimee"] = cout["fin"]
+        return expansions
+
+    def estDomine(self, etat, cout, caps, sensEtat, etatsNoeud):
+        # an expanded state of the same node that can turn in place to this heading and direction for less
+        for autre in etatsNoeud:
+            duree = cout[autre]
+            if caps[autre] is not None:
+                duree += ecartAngle(caps[autre], caps[etat]) / self.vitesseRotation
+            if sensEtat[autre] != 0 and sensEtat[autre] != sensEtat[etat]:
+                duree += TEMPS_INVERSION
+            if duree <= cout[etat]:
+                return True
+        return False
+
+    def simplifierChemin(self, tabchemin, listPointInteret, ignores=()):
+        # Greedy string pulling in one forward pass: from the current anchor, go straight to the furthest visible point.
+        # Lines of sight are tested FENETRE_SIMPLIFICATION points at a time in one vectorized call, the next window
+        # is only tested while the last point of the current one is visible. A shortcut may not go closer to the
+        # avoidance zones than the lines it replaces (up to DISTANCE_DEGAGEMENT), the elements in ignores aside
+        table = self.tableEvitement
+        masque = table.getMasque(listPointInteret)
+        inconnus = [point for point in listPointInteret if not table.contient(point)]
+        if len(tabchemin) == 0:
+            self.statistiques["verifications"] = 0
+            return tabchemin
+        points = [(tabchemin[0].x1, tabchemin[0].y1)] + [(ligne.x2, ligne.y2) for ligne in tabchemin]
+        champ = self.champDistance
+        degagements = None
+        if self.degagementActif():
+            degagements = champ.clearanceLignes([ligne.x1 for ligne in tabchemin], [ligne.y1 for ligne in tabchemin],
+                                                [ligne.x2 for ligne in tabchemin], [ligne.y2 for ligne in tabchemin], ignores)
+        verifications = 0
+        resultat = []
+        ancre = 0
+        while ancre < len(points) - 1:
+            xa, ya = points[ancre]
+            suivant = ancre + 1  # consecutive points are joined by a line of the path
+            bloque = False
+            while not bloque and suivant < len(points) - 1:
+                candidats = range(suivant + 1, min(suivant + 1 + FENETRE_SIMPLIFICATION, len(points)))
+                x2 = [points[j][0] for j in candidats]
+                y2 = [points[j][1] for j in candidats]
+                libres = ~numpy.any(table.collisions([xa] * len(candidats), [ya] * len(candidats), x2, y2) & masque, axis=1)
+                if degagements is not None:
+                    requis = numpy.minimum.accumulate(degagements[ancre:candidats[-1]])[numpy.array(candidats) - ancre - 1]
+                    requis = numpy.minimum(requis, DISTANCE_DEGAGEMENT) - champ.pas / 2
+                    libres &= champ.clearanceLignes([xa] * len(candidats), [ya] * len(candidats), x2, y2, ignores) >= requis
+                verifications += len(candidats)
+                for indice in reversed(numpy.nonzero(libres)[0]):
+                    if len(inconnus) > 0:
+                        verifications += 1
+                        if self.enCollisionCarte(Ligne("", xa, ya, x2[indice], y2[indice]), inconnus):
+                            continue
+                    suivant = candidats[indice]
+                    break
+                bloque = suivant != candidats[-1]
+            resultat.append(Ligne("", xa, ya, points[suivant][0], points[suivant][1], ""))
+            ancre = suivant
+        tabchemin[:] = resultat
+        self.statistiques["verifications"] = verifications
         return tabchemin
@@ -1,12 +1,65 @@
 import math
 
-import numpy
-
 from cartographie.ligne import Ligne
 from cartographie.cercle import Cercle
 from cartographie.rectangle import Rectangle
 
 
+def distanceSegmentCarre(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    longueurCarre = float(dx * dx + dy * dy)
+    t = 0.0
+    if longueurCarre > 0:
+        t = min(max(((px - x1) * dx + (py - y1) * dy) / longueurCarre, 0.0), 1.0)
+    ex = x1 + t * dx - px
+    ey = y1 + t * dy - py
+    return ex * ex + ey * ey
+
+
+def segmentsCroises(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    s10_x = ax2 - ax1
+    s10_y = ay2 - ay1
+    s32_x = bx2 - bx1
+    s32_y = by2 - by1
+
+    denom = s10_x * s32_y - s32_x * s10_y
+    if denom == 0:
+        return False # Collinear
+    denomPositive = denom > 0
+
+    s02_x = ax1 - bx1
+    s02_y = ay1 - by1
+    s_numer = s10_x * s02_y - s10_y * s02_x
+    if (s_numer < 0) == denomPositive:
+        return False # No collision
+
+    t_numer = s32_x * s02_y - s32_y * s02_x
+    if (t_numer < 0) == denomPositive:
+        return False # No collision
+
+    if ((s_numer > denom) == denomPositive) or ((t_numer > denom) == denomPositive):
+        return False # No collision
+
+    # Collision detected
+    return True
+
+
+def cotesRectangle(rectangle):
+    # haut, bas, gauche, droite
+    return [(rectangle.x1, rectangle.y1, rectangle.x2, rectangle.y1),
+            (rectangle.x1, rectangle.y2, rectangle.x2, rectangle.y2),
+            (rectangle.x1, rectangle.y1, rectangle.x1, rectangle.y2),
+            (rectangle.x2, rectangle.y1, rectangle.x2, rectangle.y2)]
+
+
+def aretesPolygone(polygone):
+    # edges (point i, point i-1), the first one closes the polygon. Built once by Polygone.calculerBoite
+    return polygone.aretes
+
+
+# Shapes are solid: two shapes collide when they share a point, so a segment or a shape lying entirely inside
+# another one collides with it, whatever their types. TableObstacles.collisions follows the same rule.
 class Collision:
 
     fenetre = None
@@ -15,54 +68,35 @@ class Collision:
         self.fenetre = fenetre
 
     def collisionEntre(self,forme1,forme2):
+        if not forme1.chevauche(forme2):
+            return False # bounding boxes apart, no exact test needed
         return getattr(self,"collision"+forme1.__class__.__name__+forme2.__class__.__name__)(forme1,forme2)
 
     def contenuDans(self,x,y,forme):
         if isinstance(forme, Ligne):
             return False
         if isinstance(forme, Cercle):
-            return forme.distanceAvec(Ligne("", x, y, x, y)) <= forme.rayon
+            return (x - forme.x) * (x - forme.x) + (y - forme.y) * (y - forme.y) <= forme.rayon * forme.rayon
         if isinstance(forme, Rectangle):
             return forme.x1 <= x and forme.x2 >= x and forme.y1 <= y and forme.y2 >= y
-        ligne = Ligne("", x, y, forme.x, forme.y)
-        return not self.collisionEntre(ligne, forme)
+        #even-odd rule, also right for the non convex polygons
+        boite = forme.boite
+        if len(forme.pointList) < 3 or not (boite[0] <= x <= boite[2] and boite[1] <= y <= boite[3]):
+            return False
+        dedans = False
+        for px, py, lx, ly in aretesPolygone(forme):
+            if (ly > y) != (py > y) and x < lx + (y - ly) * (px - lx) / (py - ly):
+                dedans = not dedans
+        return dedans
 
     def collisionLigneLigne(self,ligne1,ligne2):
-
-        s10_x = ligne1.x2 - ligne1.x1
-        s10_y = ligne1.y2 - ligne1.y1
-        s32_x = ligne2.x2 - ligne2.x1
-        s32_y = ligne2.y2 - ligne2.y1
-
-        denom = s10_x * s32_y - s32_x * s10_y
-        if denom == 0:
-            return False # Collinear
-        denomPositive = denom > 0
-
-        s02_x = ligne1.x1 - ligne2.x1
-        s02_y = ligne1.y1 - ligne2.y1
-        s_numer = s10_x * s02_y - s10_y * s02_x
-        if (s_numer < 0) == denomPositive:
-            return False # No collision
-
-        t_numer = s32_x * s02_y - s32_y * s02_x
-        if (t_numer < 0) == denomPositive:
-            return False # No collision
-
-        if ((s_numer > denom) == denomPositive) or ((t_numer > denom) == denomPositive):
-            return False # No collision
-
-        # Collision detected
-        return True
+        return segmentsCroises(ligne1.x1, ligne1.y1, ligne1.x2, ligne1.y2, ligne2.x1, ligne2.y1, ligne2.x2, ligne2.y2)
 
     def collisionRectangleLigne(self,rectangle,ligne):
-        haut=Ligne("haut",rectangle.x1,rectangle.y1,rectangle.x2,rectangle.y1,"black")
-        bas=Ligne("bas",rectangle.x1,rectangle.y2,rectangle.x2,rectangle.y2,"black")
-        gauche=Ligne("gauche",rectangle.x1,rectangle.y1,rectangle.x1,rectangle.y2,"black")
-        droite=Ligne("droite",rectangle.x2,rectangle.y1,rectangle.x2,rectangle.y2,"black")
-        if self.collisionEntre(ligne,haut) or self.collisionEntre(ligne,bas) or self.collisionEntre(ligne,gauche) or self.collisionEntre(ligne,droite):
-            return True
-        return False
+        for cote in cotesRectangle(rectangle):
+            if segmentsCroises(ligne.x1, ligne.y1, ligne.x2, ligne.y2, *cote):
+                return True
+        return self.contenuDans(ligne.x1, ligne.y1, rectangle) # no edge crossed, the segment may be inside
 
     def collisionLigneRectangle(self,ligne,rectangle):
         return self.collisionRectangleLigne(rectangle, ligne)
@@ -77,29 +111,7 @@ class Collision:
         return not (OutsideBottom or OutsideTop or OutsideLeft or OutsideRight)
 
     def collisionCercleLigne(self,cercle,ligne):
-        listeLigne = []
-        nbrect = 8
-        x = cercle.x + cercle.rayon *1.*math.sin(0)
-        y = cercle.y + cercle.rayon *1. *math.cos(0)
-        for i in numpy.arange(0,math.pi*2,math.pi/(nbrect+1)*2):
-            x1 = cercle.x + cercle.rayon *1.*math.sin(i)
-            y1 = cercle.y + cercle.rayon *1. *math.cos(i)
-            ligne1 = Ligne("", x, y, x1, y1, "red")
-            listeLigne.append(ligne1)
-            x = x1
-            y = y1
-
-        x1 = cercle.x + cercle.rayon *1.*math.sin(0)
-        y1 = cercle.y + cercle.rayon *1. *math.cos(0)
-        listeLigne.append(Ligne("", x, y, x1, y1, "red"))
-
-        for ligne1 in listeLigne:
-            """if self.fenetre != None:
-                ligne.setCouleur("blue")
-                ligne.dessiner(self.fenetre)"""
-            if self.collisionEntre(ligne1,ligne):
-                return True
-        return False
+        return distanceSegmentCarre(cercle.x, cercle.y, ligne.x1, ligne.y1, ligne.x2, ligne.y2) <= cercle.rayon * cercle.rayon
 
     def collisionLigneCercle(self,ligne,cercle):
         return self.collisionCercleLigne(cercle,ligne)
@@ -111,102 +123,61 @@ class Collision:
         return dist <= (cercle1.rayon + cercle2.rayon)
 
     def collisionCercleRectangle(self,cercle,rectangle):
-        listCote = []
-        listCote.append(Ligne("haut", rectangle.x1, rectangle.y1, rectangle.x2, rectangle.y1, "black"))
-        listCote.append(Ligne("bas", rectangle.x1, rectangle.y2, rectangle.x2, rectangle.y2, "black"))
-        listCote.append(Ligne("gauche", rectangle.x1, rectangle.y1, rectangle.x1, rectangle.y2, "black"))
-        listCote.append(Ligne("droite", rectangle.x2, rectangle.y1, rectangle.x2, rectangle.y2, "black"))
-
-        listeRect = []
-        nbrect = 7
-        for i in numpy.arange(0, math.pi, math.pi / (nbrect + 1)):
-            x = cercle.rayon * 1. * math.sin(i)
-            y = cercle.rayon * 1. * math.cos(i)
-            rect = Rectangle("", cercle.x - x, cercle.y - y, cercle.x + x, cercle.y + y, "red")
-            listeRect.append(rect)
-        for cote in listCote:
-            for rect in listeRect:
-                if self.collisionEntre(rect,cote):
-                    return True
-        return False
+        #closest point of the rectangle to the center
+        x = min(max(cercle.x, min(rectangle.x1, rectangle.x2)), max(rectangle.x1, rectangle.x2))
+        y = min(max(cercle.y, min(rectangle.y1, rectangle.y2)), max(rectangle.y1, rectangle.y2))
+        dx = cercle.x - x
+        dy = cercle.y - y
+        return dx * dx + dy * dy <= cercle.rayon * cercle.rayon
 
     def collisionRectangleCercle(self,rectangle,cercle):
         return self.collisionCercleRectangle(cercle,rectangle)
 
     def collisionPolygoneLigne(self, polygone, ligne):
-        count=0
-        firstPoint = polygone.pointList[0]
-        lastPoint = polygone.pointList[0]
-        for point in polygone.pointList:
-            count+=1
-            if count == 1:
-                continue
-            currentLine = Ligne("", float(point["x"]), float(point["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-            if self.collisionLigneLigne(currentLine, ligne):
+        for arete in aretesPolygone(polygone):
+            if segmentsCroises(arete[0], arete[1], arete[2], arete[3], ligne.x1, ligne.y1, ligne.x2, ligne.y2):
                 return True
-            lastPoint = point
-        currentLine = Ligne("", float(firstPoint["x"]), float(firstPoint["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-        if self.collisionLigneLigne(currentLine, ligne):
-            return True
-        return False
+        return self.contenuDans(ligne.x1, ligne.y1, polygone) # no edge crossed, the segment may be inside
 
     def collisionLignePolygone(self, ligne, polygone):
         return self.collisionPolygoneLigne(polygone, ligne)
 
     def collisionPolygonePolygone(self, polgone1, polygone2):
-        count = 0
-        firstPoint = polgone1.pointList[0]
-        lastPoint = polgone1.pointList[0]
-        for point in polgone1.pointList:
-            count += 1
-            if count == 1:
-                continue
-            currentLine = Ligne("", float(point["x"]), float(point["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-            if self.collisionPolgoneLigne(polygone2, currentLine):
-                return True
-            lastPoint = point
-        currentLine = Ligne("", float(firstPoint["x"]), float(firstPoint["y"]), float(lastPoint["x"]),
-                            float(lastPoint["y"]))
-        if self.collisionPolgoneLigne(polygone2, currentLine):
-            return True
-        return False
+        aretes2 = aretesPolygone(polygone2)
+        for arete1 in aretesPolygone(polgone1):
+            for arete2 in aretes2:
+                if segmentsCroises(arete2[0], arete2[1], arete2[2], arete2[3], arete1[0], arete1[1], arete1[2], arete1[3]):
+                    return True
+        # no edge crossed, one of them may be inside the other
+        return self.sommetDans(polgone1, polygone2) or self.sommetDans(polygone2, polgone1)
+
+    def sommetDans(self, forme, conteneur):
+        # a point of the border of forme inside conteneur, enough to tell once no edges cross
+        if isinstance(forme, Rectangle):
+            return self.contenuDans(forme.x1, forme.y1, conteneur)
+        return len(forme.pointList) > 0 and self.contenuDans(forme.pointList[0]["x"], forme.pointList[0]["y"], conteneur)
 
     def collisionPolygoneRectangle(self, polygone, rectangle):
-        count=0
-        firstPoint = polygone.pointList[0]
-        lastPoint = polygone.pointList[0]
-        for point in polygone.pointList:
-            count+=1
-            if count == 1:
-                continue
-            currentLine = Ligne("", float(point["x"]), float(point["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-            if self.collisionLigneRectangle(currentLine, rectangle):
-                return True
-            lastPoint = point
-        currentLine = Ligne("", float(firstPoint["x"]), float(firstPoint["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-        if self.collisionLigneRectangle(currentLine, rectangle):
-            return True
-        return False
+        cotes = cotesRectangle(rectangle)
+        for arete in aretesPolygone(polygone):
+            for cote in cotes:
+                if segmentsCroises(arete[0], arete[1], arete[2], arete[3], *cote):
+                    return True
+        # no edge crossed, one of them may be inside the other
+        return self.sommetDans(rectangle, polygone) or self.sommetDans(polygone, rectangle)
 
     def collisionRectanglePolygone(self, rectangle, polygone):
         return self.collisionPolygoneRectangle(polygone, rectangle)
 
     def collisionPolygoneCercle(self, polygone, cercle):
-        count=0
-        firstPoint = polygone.pointList[0]
-        lastPoint = polygone.pointList[0]
-        for point in polygone.pointList:
-            count+=1
-            if count == 1:
-                continue
-            currentLine = Ligne("", float(point["x"]), float(point["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-            if self.collisionLigneCercle(currentLine, cercle):
+        rayonCarre = cercle.rayon * cercle.rayon
+        dedans = False
+        for x, y, lx, ly in aretesPolygone(polygone):
+            if distanceSegmentCarre(cercle.x, cercle.y, lx, ly, x, y) <= rayonCarre:
                 return True
-            lastPoint = point
-        currentLine = Ligne("", float(firstPoint["x"]), float(firstPoint["y"]), float(lastPoint["x"]), float(lastPoint["y"]))
-        if self.collisionLigneCercle(currentLine, cercle):
-            return True
-        return False
+            if (ly > cercle.y) != (y > cercle.y) and cercle.x < lx + (cercle.y - ly) * (x - lx) / (y - ly):
+                dedans = not dedans #even-odd rule, the circle can be inside the polygon without touching an edge
+        return dedans
 
     def collisionCerclePolygone(self, cercle, polygone):
         return self.collisionPolygoneCercle(polygone, cercle)
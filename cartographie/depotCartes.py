@@ -0,0 +1,72 @@
+import os
+
+from cartographie.lecteurCarte import LecteurCarte
+
+
+# Geometry of a map file, parsed once: size, background and the points of interest of each robot width.
+# The PointInteret objects are shared by every user of the process (main, objective executors, display, compilers)
+# and must not be modified. What changes during a match lives outside: the list given by nouvellePartie, where the
+# robot removes the elements it took, and the ObstaclesDynamiques of the ChercheurChemin.
+class ModeleCarte:
+
+    def __init__(self, fichier, lecteur):
+        self.fichier = fichier
+        self.lecteur = lecteur
+        self.hash = lecteur.getHash()
+        self.taille = lecteur.getTaille()
+        self.fond = lecteur.getFond()
+        self.pointsInteret = {}  # largeur robot -> tuple of PointInteret
+
+    def getHash(self):
+        return self.hash
+
+    def getTaille(self):
+        return self.taille
+
+    def getFond(self):
+        return self.fond
+
+    def getPointsInteret(self, largeurRobot):
+        # the avoidance zones depend on the robot width
+        if largeurRobot not in self.pointsInteret:
+            self.lecteur.distanceEvitement = largeurRobot
+            self.pointsInteret[largeurRobot] = tuple(self.lecteur.lire())
+        return self.pointsInteret[largeurRobot]
+
+    def nouvellePartie(self, largeurRobot):
+        # mutable list of the elements still on the table, one per match
+        return list(self.getPointsInteret(largeurRobot))
+
+
+# Maps already read, keyed by the md5 of their content: a file given twice, or two copies of a file, give the same
+# ModeleCarte. The hash of a path is kept while its modification time and size do not change, the file is then
+# neither hashed nor parsed again.
+class DepotCartes:
+
+    def __init__(self):
+        self.modeles = {}
+        self.hashs = {}
+
+    def getCarte(self, fichier):
+        try:
+            stat = os.stat(fichier)
+        except OSError:
+            return None
+        cle = (os.path.abspath(fichier), stat.st_mtime, stat.st_size)
+        hash = self.hashs.get(cle)
+        if hash is None or hash not in self.modeles:
+            lecteur = LecteurCarte(fichier, 0)
+            hash = lecteur.getHash()
+            if hash == "":
+                return None
+            self.hashs[cle] = hash
+            if hash not in self.modeles:
+                self.modeles[hash] = ModeleCarte(fichier, lecteur)
+        return self.modeles[hash]
+
+    def vider(self):
+        self.modeles = {}
+        self.hashs = {}
+
+
+depot = DepotCartes()
@@ -8,6 +8,7 @@ class Forme:
 
     x = None
     y = None
+    boite = None  # (xmin, ymin, xmax, ymax), refreshed by calculerBoite each time the shape changes
 
     def distanceAvec(self,forme):
         x=max(self.x,forme.x)-min(self.x,forme.x)
@@ -15,6 +16,18 @@ class Forme:
         return math.sqrt(math.pow(x,2)+math.pow(y,2))
 
 
+    def chevauche(self, forme):
+        # the bounding boxes overlap, borders included
+        a = self.boite
+        b = forme.boite
+        if a is None or b is None:
+            return True
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+    @abstractmethod
+    def calculerBoite(self):
+        pass
+
     @abstractmethod
     def dessiner(self, fenetre):
         pass
@@ -1,98 +1,273 @@
-from cartographie.noeud import Noeud
+import math
 
+import numpy
+
+from cartographie.tableObstacles import pointsContenus
+
+RAYON_RECHERCHE = 10  # rings of cells explored around a blocked start or end point
+
+
+def trouverPointLibre(graph, x, y, noeud, blockingElements, rayonMax=RAYON_RECHERCHE):
+    # Ring search around the snapped cell for the nearest node that is free for this query
+    if noeud is None or blockingElements is None or graph.estLibre(noeud, blockingElements):
+        return noeud
+    cx = int(round(float(x) / graph.step))
+    cy = int(round(float(y) / graph.step))
+    meilleur = None
+    meilleureDistance = float("inf")
+    for r in range(1, rayonMax + 1):
+        for i in range(-r, r + 1):
+            for j in ([-r, r] if abs(i) != r else range(-r, r + 1)):
+                candidat = graph.getNoeudCase(cx + i, cy + j)
+                if candidat is None or not graph.estLibre(candidat, blockingElements):
+                    continue
+                px, py = graph.getPosition(candidat)
+                distance = math.hypot(px - x, py - y)
+                if distance < meilleureDistance:
+                    meilleur = candidat
+                    meilleureDistance = distance
+        # nodes on the next rings are at least (r + 0.5) steps away
+        if meilleur is not None and meilleureDistance <= (r + 0.5) * graph.step:
+            break
+    if meilleur is None:
+        return noeud
+    return meilleur
+
+
+def elementsMasque(masque, elements, noeud):
+    # elements whose bit is set in the masque row of a node
+    listeElements = []
+    for index, element in enumerate(elements):
+        if masque[noeud, index >> 3] & (1 << (index & 7)):
+            listeElements.append(element)
+    return listeElements
+
+
+def serialiserGraph(graph, hash):
+    # XML export shared by the graph backends: position, neighbours and covering elements of each node
+    serialization = "<graph"
+    serialization += " hash='" + hash + "'"
+    serialization += " >\r\n"
+    noeuds = graph.getNoeuds()
+    positions = [graph.getPosition(noeud) for noeud in noeuds]
+    ids = [str(x) + "," + str(y) for x, y in positions]
+    for noeud in noeuds:
+        serialization += "<n id='" + ids[noeud] + "'"
+        serialization += " x='" + str(positions[noeud][0]) + "'"
+        serialization += " y='" + str(positions[noeud][1]) + "'"
+        serialization += " v='" + ";".join([ids[voisin] for voisin in graph.getVoisin(noeud)]) + "'"
+        serialization += " c='" + ";".join([element.getID() for element in graph.getElements(noeud)]) + "'"
+        serialization += "/>\r\n"
+    serialization += "</graph>"
+    return serialization
+
+
+# Navigation graph stored in arrays: nodes are integer ids, coordinates are in xs/ys, neighbours in CSR arrays
+# (indptr, indices) and the elements covering each node in one bit per PointInteret of the masque.
+# visite and pere are scratch arrays stamped with the current search: nettoyer only starts a new search.
 class Graph:
 
     def __init__(self):
-        self.listeNoeud = {}
+        self.step = None
+        self.nbCellules = 0
+        self.xs = []
+        self.ys = []
+        self.indexPosition = {}
+        self.indptr = numpy.zeros(1, dtype=numpy.int32)
+        self.indices = numpy.zeros(0, dtype=numpy.int32)
+        self.voisins = []
+        self.elements = []
+        self.indexElement = {}
+        self.masque = numpy.zeros((0, 1), dtype=numpy.uint8)
+        self._elementsNoeud = []  # elements of the nodes added since the last creerVoisins
+        self._libresCle = None
+        self._libres = None
+        self.recherche = 0
+        self.visite = []
+        self.pere = []
+        self.recherchePere = []
 
     def serialize(self, hash):
-        serialization = "<graph"
-        serialization += " hash='" + hash + "'"
-        serialization += " >\r\n"
-        for key, noeud in self.listeNoeud.iteritems():
-            serialization += noeud.serialize() + "\r\n"
-        serialization += "</graph>"
-        return serialization
-
-    def initFromSerialization(self, serialization, listePointInteret):
-        listVoisin = {}
-        listColision = {}
-        for node in serialization:
-            if node.tag == "n":
-                x = int(node.get("x"))
-                y = int(node.get("y"))
-                newNoeud = Noeud(x, y)
-                self.addNoeud(newNoeud)
-                listVoisin[newNoeud.getID()] = []
-                listColision[newNoeud.getID()] = []
-                voisinIds = node.get("v").split(";")
-                colisionIds = node.get("c").split(";")
-                if voisinIds[0] != '':
-                    for id in voisinIds:
-                        listVoisin[newNoeud.getID()].append(id)
-                if colisionIds[0] != '':
-                    for id in colisionIds:
-                        listColision[newNoeud.getID()].append(id)
-        for nodeId, idList in listVoisin.iteritems():
-            currentNode = self.listeNoeud[nodeId]
-            for idNode in idList:
-                currentNode.listVoisin.append(self.listeNoeud[idNode])
+        return serialiserGraph(self, hash)
+
+    def getNoeuds(self):
+        # ids follow the (x, y) order of the nodes, like the cells of Grille
+        return range(0, self.nbCellules)
+
+    def toCache(self):
+        return {"xs": self.xs, "ys": self.ys, "indptr": self.indptr, "indices": self.indices,
+                "masque": self.masque, "elements": [element.getID() for element in self.elements]}
+
+    def initFromCache(self, cache, listePointInteret):
+        self.step = cache["step"]
         mapPointInteret = {}
         for point in listePointInteret:
             mapPointInteret[point.getID()] = point
-        for nodeId, idList in listColision.iteritems():
-            currentNode = self.listeNoeud[nodeId]
-            for idObject in idList:
-                currentNode.colisionObject.append(mapPointInteret[idObject])
+        elements = []
+        for idObject in cache["elements"]:
+            if idObject not in mapPointInteret:
+                return False
+            elements.append(mapPointInteret[idObject])
+        self.xs = cache["xs"].tolist()
+        self.ys = cache["ys"].tolist()
+        self.nbCellules = len(self.xs)
+        self.indexPosition = dict(((x, y), i) for i, (x, y) in enumerate(zip(self.xs, self.ys)))
+        self.elements = elements
+        self.indexElement = dict((element, index) for index, element in enumerate(elements))
+        self.masque = numpy.array(cache["masque"])
+        self._elementsNoeud = []
+        self.construire(numpy.array(cache["indptr"]), numpy.array(cache["indices"]))
+        return True
 
-    def addNoeud(self, noeud):
-        self.listeNoeud[str(noeud.x)+","+str(noeud.y)] = noeud
+    def addNoeud(self, x, y, listeElements=()):
+        noeud = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.indexPosition[(x, y)] = noeud
+        self._elementsNoeud.append(list(listeElements))
+        return noeud
 
     def getKey(self, x, y):
         return str(x) + "," + str(y)
 
     def getNoeud(self, x, y):
-        return self.listeNoeud[self.getKey(x, y)]
+        return self.indexPosition[(x, y)]
+
+    def getElements(self, noeud):
+        return elementsMasque(self.masque, self.elements, noeud)
 
     def dessiner(self, fenetre):
-        for key, noeud in self.listeNoeud.iteritems():
-            noeud.dessiner(fenetre)
+        size = 5
+        occupe = numpy.any(self.masque != 0, axis=1)
+        for noeud in range(0, self.nbCellules):
+            x, y = self.getPosition(noeud)
+            color = "purple" if occupe[noeud] else "black"
+            fenetre.drawLine("", x-size, y-size, x+size, y+size, color)
+            fenetre.drawLine("", x+size, y-size, x-size, y+size, color)
 
     def creerVoisins(self, step):
-        for key, noeud in self.listeNoeud.iteritems():
-            x = noeud.x
-            y = noeud.y
-            voisins = [[-1,0],[1,0],[0,-1],[0,1], [-1,-1],[1,1],[1,-1],[-1,1]]
+        self.step = step
+        voisins = [[-1,0],[1,0],[0,-1],[0,1], [-1,-1],[1,1],[1,-1],[-1,1]]
+        indices = []
+        indptr = [0]
+        for x, y in zip(self.xs, self.ys):
             for position in voisins:
-                if self.getKey(x+position[0]*step, y+position[1]*step) in self.listeNoeud:
-                    noeud.addVoisin(self.getNoeud(x+position[0]*step, y+position[1]*step))
-
-    def trouverPointProche(self, x, y):
-        nearest = None
-        minDist = 999999
-        for key, noeud in self.listeNoeud.iteritems():
-            dist = noeud.distanceAvecXY(x,y)
-            if minDist > dist:
-                nearest = noeud
-                minDist = dist
-        return nearest
+                voisin = self.indexPosition.get((x+position[0]*step, y+position[1]*step))
+                if voisin is not None:
+                    indices.append(voisin)
+            indptr.append(len(indices))
+        self.construire(numpy.array(indptr, dtype=numpy.int32), numpy.array(indices, dtype=numpy.int32))
+
+    def construire(self, indptr, indices):
+        # adjacency and element bits of the nodes added with addNoeud, fresh scratch arrays
+        self.nbCellules = len(self.xs)
+        for elements in self._elementsNoeud:
+            for element in elements:
+                if element not in self.indexElement:
+                    self.indexElement[element] = len(self.elements)
+                    self.elements.append(element)
+        nbOctets = max(1, (len(self.elements) + 7) // 8)
+        if self.masque.shape != (self.nbCellules, nbOctets):
+            masque = numpy.zeros((self.nbCellules, nbOctets), dtype=numpy.uint8)
+            masque[:self.masque.shape[0], :self.masque.shape[1]] = self.masque
+            self.masque = masque
+        debut = self.nbCellules - len(self._elementsNoeud)
+        for i, elements in enumerate(self._elementsNoeud):
+            for element in elements:
+                index = self.indexElement[element]
+                self.masque[debut + i, index >> 3] |= 1 << (index & 7)
+        self._elementsNoeud = []
+        self.indptr = indptr
+        self.indices = indices
+        listeIndptr = indptr.tolist()
+        listeIndices = indices.tolist()
+        self.voisins = [listeIndices[listeIndptr[i]:listeIndptr[i + 1]] for i in range(0, self.nbCellules)]
+        self._libresCle = None
+        self.recherche = 0
+        self.visite = [0] * self.nbCellules
+        self.pere = [None] * self.nbCellules
+        self.recherchePere = [0] * self.nbCellules
+        self.nettoyer()
+
+    def getNoeudsFenetre(self, boite):
+        if self.step is None:
+            return self.getNoeuds()
+        listeNoeud = []
+        for ix in range(int(math.floor(boite[0] / self.step)), int(math.ceil(boite[2] / self.step)) + 1):
+            for iy in range(int(math.floor(boite[1] / self.step)), int(math.ceil(boite[3] / self.step)) + 1):
+                noeud = self.getNoeudCase(ix, iy)
+                if noeud is not None:
+                    listeNoeud.append(noeud)
+        return listeNoeud
+
+    def retirerElement(self, element, boite):
+        index = self.indexElement.get(element)
+        if index is None:
+            return
+        noeuds = self.getNoeudsFenetre(boite)
+        self.masque[noeuds, index >> 3] &= numpy.uint8(~(1 << (index & 7)) & 0xFF)
+        self._libresCle = None
+
+    def ajouterElement(self, element, boite):
+        index = self.indexElement.get(element)
+        if index is None:
+            index = len(self.elements)
+            self.elements.append(element)
+            self.indexElement[element] = index
+            if index >> 3 >= self.masque.shape[1]:
+                self.masque = numpy.hstack([self.masque, numpy.zeros((self.nbCellules, 1), dtype=numpy.uint8)])
+        noeuds = numpy.array(self.getNoeudsFenetre(boite), dtype=int)
+        xs = numpy.array(self.xs, dtype=float)[noeuds]
+        ys = numpy.array(self.ys, dtype=float)[noeuds]
+        contenu = pointsContenus(element.zoneEvitement.forme, xs, ys)
+        self.masque[noeuds[contenu], index >> 3] |= 1 << (index & 7)
+        self._libresCle = None
+
+    def getPosition(self, noeud):
+        return self.xs[noeud], self.ys[noeud]
+
+    def estLibre(self, noeud, blockingElements):
+        cle = frozenset(blockingElements)
+        if cle != self._libresCle:
+            autorises = numpy.zeros(self.masque.shape[1], dtype=numpy.uint8)
+            for element in blockingElements:
+                index = self.indexElement.get(element)
+                if index is not None:
+                    autorises[index >> 3] |= 1 << (index & 7)
+            self._libres = (~numpy.any(self.masque & ~autorises, axis=1)).tolist()
+            self._libresCle = cle
+        return self._libres[noeud]
+
+    def getNoeudCase(self, ix, iy):
+        return self.indexPosition.get((ix * self.step, iy * self.step))
+
+    def trouverPointProche(self, x, y, blockingElements=None):
+        if self.step is not None:
+            noeud = self.getNoeudCase(int(round(float(x) / self.step)), int(round(float(y) / self.step)))
+            if noeud is not None:
+                return trouverPointLibre(self, x, y, noeud, blockingElements)
+        if self.nbCellules == 0:
+            return None
+        return int(numpy.argmin((numpy.array(self.xs) - x) ** 2 + (numpy.array(self.ys) - y) ** 2))
 
     def marquer(self, noeud):
-        noeud.visite = True
+        self.visite[noeud] = self.recherche
 
     def estMaquer(self, noeud):
-        return noeud.visite
+        return self.visite[noeud] == self.recherche
 
     def setPere(self, noeud, pere):
-        noeud.pere = pere
+        self.pere[noeud] = pere
+        self.recherchePere[noeud] = self.recherche
 
     def getPere(self, noeud):
-        return noeud.pere
+        if self.recherchePere[noeud] != self.recherche:
+            return None
+        return self.pere[noeud]
 
     def getVoisin(self, noeud):
-        return noeud.listVoisin
+        return self.voisins[noeud]
 
     def nettoyer(self):
-        for key, noeud in self.listeNoeud.iteritems():
-            noeud.visite = False
-            noeud.pere = None
+        # a new search number, the marks and parents of the previous searches no longer count
+        self.recherche += 1
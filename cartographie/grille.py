@@ -0,0 +1,188 @@
+import math
+
+import numpy
+
+from cartographie.graph import trouverPointLibre, elementsMasque, serialiserGraph
+from cartographie.tableObstacles import pointsContenus
+
+
+# Navigation graph stored as NumPy arrays: one cell per grid point, one obstacle bit per PointInteret.
+# Nodes are integer cell indices (ix * ny + iy, same order as the Noeud graph) and the
+# 8-neighbour adjacency is implicit, so no Python object is created per node.
+# visite and pere are scratch arrays stamped with the current search, as in Graph: nettoyer only starts a new search.
+class Grille:
+
+    voisins = [[-1,0],[1,0],[0,-1],[0,1], [-1,-1],[1,1],[1,-1],[-1,1]]
+
+    def __init__(self, largeur, longueur, step):
+        self.step = step
+        self.nx = largeur // step + 1
+        self.ny = longueur // step + 1
+        self.nbCellules = self.nx * self.ny
+        ix, iy = numpy.meshgrid(numpy.arange(self.nx), numpy.arange(self.ny), indexing="ij")
+        self.xs = (ix * step).ravel()
+        self.ys = (iy * step).ravel()
+        self.elements = []
+        self.indexElement = {}
+        self.masque = numpy.zeros((self.nbCellules, 1), dtype=numpy.uint8)
+        self._libresCle = None
+        self._libres = None
+        self.recherche = 0
+        self.visite = [0] * self.nbCellules
+        self.pere = [None] * self.nbCellules
+        self.recherchePere = [0] * self.nbCellules
+        self.nettoyer()
+
+    def rasteriser(self, listePointInteret):
+        self.elements = list(listePointInteret)
+        self.indexElement = {}
+        nbOctets = max(1, (len(self.elements) + 7) // 8)
+        self.masque = numpy.zeros((self.nbCellules, nbOctets), dtype=numpy.uint8)
+        for index, element in enumerate(self.elements):
+            self.indexElement[element] = index
+            contenu = pointsContenus(element.zoneEvitement.forme, self.xs, self.ys)
+            self.masque[:, index >> 3] |= contenu.astype(numpy.uint8) << (index & 7)
+        self._libresCle = None
+
+    def toCache(self):
+        voisins = numpy.array(self.voisins)
+        ix = (self.xs // self.step)[:, None] + voisins[:, 0]
+        iy = (self.ys // self.step)[:, None] + voisins[:, 1]
+        valides = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        indptr = numpy.zeros(self.nbCellules + 1, dtype=numpy.int32)
+        indptr[1:] = numpy.cumsum(valides.sum(axis=1))
+        return {"xs": self.xs, "ys": self.ys, "indptr": indptr, "indices": (ix * self.ny + iy)[valides],
+                "masque": self.masque, "elements": [element.getID() for element in self.elements]}
+
+    def initFromCache(self, cache, listePointInteret):
+        if len(cache["xs"]) != self.nbCellules:
+            return False
+        if not numpy.array_equal(cache["xs"], self.xs) or not numpy.array_equal(cache["ys"], self.ys):
+            return False
+        mapPointInteret = {}
+        for point in listePointInteret:
+            mapPointInteret[point.getID()] = point
+        elements = []
+        for idObject in cache["elements"]:
+            if idObject not in mapPointInteret:
+                return False
+            elements.append(mapPointInteret[idObject])
+        self.elements = elements
+        self.indexElement = {}
+        for index, element in enumerate(self.elements):
+            self.indexElement[element] = index
+        self.masque = cache["masque"]
+        self._libresCle = None
+        return True
+
+    def serialize(self, hash):
+        return serialiserGraph(self, hash)
+
+    def getMasqueElements(self, listeElements):
+        masque = numpy.zeros(self.masque.shape[1], dtype=numpy.uint8)
+        for element in listeElements:
+            index = self.indexElement.get(element)
+            if index is not None:
+                masque[index >> 3] |= 1 << (index & 7)
+        return masque
+
+    def getElements(self, cellule):
+        return elementsMasque(self.masque, self.elements, cellule)
+
+    def getFenetre(self, boite):
+        # cells of the grid inside the bounding box (xmin, ymin, xmax, ymax)
+        ix1 = max(int(math.floor(boite[0] / self.step)), 0)
+        iy1 = max(int(math.floor(boite[1] / self.step)), 0)
+        ix2 = min(int(math.ceil(boite[2] / self.step)), self.nx - 1)
+        iy2 = min(int(math.ceil(boite[3] / self.step)), self.ny - 1)
+        if ix1 > ix2 or iy1 > iy2:
+            return numpy.zeros(0, dtype=int)
+        ix, iy = numpy.meshgrid(numpy.arange(ix1, ix2 + 1), numpy.arange(iy1, iy2 + 1), indexing="ij")
+        return (ix * self.ny + iy).ravel()
+
+    def getNoeuds(self):
+        return range(0, self.nbCellules)
+
+    def getNoeudsFenetre(self, boite):
+        return self.getFenetre(boite).tolist()
+
+    def retirerElement(self, element, boite=None):
+        index = self.indexElement.get(element)
+        if index is None:
+            return
+        cellules = slice(None) if boite is None else self.getFenetre(boite)
+        self.masque[cellules, index >> 3] &= numpy.uint8(~(1 << (index & 7)) & 0xFF)
+        self._libresCle = None
+
+    def ajouterElement(self, element, boite):
+        index = self.indexElement.get(element)
+        if index is None:
+            index = len(self.elements)
+            self.elements.append(element)
+            self.indexElement[element] = index
+            if index >> 3 >= self.masque.shape[1]:
+                self.masque = numpy.hstack([self.masque, numpy.zeros((self.nbCellules, 1), dtype=numpy.uint8)])
+        cellules = self.getFenetre(boite)
+        contenu = pointsContenus(element.zoneEvitement.forme, self.xs[cellules], self.ys[cellules])
+        self.masque[cellules, index >> 3] |= contenu.astype(numpy.uint8) << (index & 7)
+        self._libresCle = None
+
+    def estLibre(self, cellule, blockingElements):
+        cle = frozenset(blockingElements)
+        if cle != self._libresCle:
+            autorises = self.getMasqueElements(blockingElements)
+            self._libres = (~numpy.any(self.masque & ~autorises, axis=1)).tolist()
+            self._libresCle = cle
+        return self._libres[cellule]
+
+    def getPosition(self, cellule):
+        ix, iy = divmod(cellule, self.ny)
+        return ix * self.step, iy * self.step
+
+    def getNoeudCase(self, ix, iy):
+        if 0 <= ix < self.nx and 0 <= iy < self.ny:
+            return ix * self.ny + iy
+        return None
+
+    def trouverPointProche(self, x, y, blockingElements=None):
+        ix = min(max(int(round(float(x) / self.step)), 0), self.nx - 1)
+        iy = min(max(int(round(float(y) / self.step)), 0), self.ny - 1)
+        return trouverPointLibre(self, x, y, ix * self.ny + iy, blockingElements)
+
+    def getVoisin(self, cellule):
+        ix, iy = divmod(cellule, self.ny)
+        listVoisin = []
+        for position in self.voisins:
+            vx = ix + position[0]
+            vy = iy + position[1]
+            if 0 <= vx < self.nx and 0 <= vy < self.ny:
+                listVoisin.append(vx * self.ny + vy)
+        return listVoisin
+
+    def dessiner(self, fenetre):
+        size = 5
+        occupe = numpy.any(self.masque != 0, axis=1)
+        for cellule in range(0, self.nbCellules):
+            x, y = self.getPosition(cellule)
+            color = "purple" if occupe[cellule] else "black"
+            fenetre.drawLine("", x-size, y-size, x+size, y+size, color)
+            fenetre.drawLine("", x+size, y-size, x-size, y+size, color)
+
+    def marquer(self, cellule):
+        self.visite[cellule] = self.recherche
+
+    def estMaquer(self, cellule):
+        return self.visite[cellule] == self.recherche
+
+    def setPere(self, cellule, pere):
+        self.pere[cellule] = pere
+        self.recherchePere[cellule] = self.recherche
+
+    def getPere(self, cellule):
+        if self.recherchePere[cellule] != self.recherche:
+            return None
+        return self.pere[cellule]
+
+    def nettoyer(self):
+        # a new search number, the marks and parents of the previous searches no longer count
+        self.recherche += 1
@@ -0,0 +1,53 @@
+import math
+
+
+def boiteEnglobante(forme):
+    if forme.boite is not None:
+        return forme.boite
+    return forme.x, forme.y, forme.x, forme.y
+
+
+# Uniform bucket grid over the bounding boxes of the map shapes.
+# Each element is stored in every bucket its box overlaps, a query returns the elements whose box overlaps the query box.
+class IndexSpatial:
+
+    def __init__(self, tailleCase=250):
+        self.tailleCase = float(tailleCase)
+        self.cases = {}
+        self.boites = {}
+
+    def getCase(self, valeur):
+        return int(math.floor(valeur / self.tailleCase))
+
+    def ajouter(self, element, forme):
+        if element in self.boites:
+            self.retirer(element)
+        boite = boiteEnglobante(forme)
+        self.boites[element] = boite
+        for i in range(self.getCase(boite[0]), self.getCase(boite[2]) + 1):
+            for j in range(self.getCase(boite[1]), self.getCase(boite[3]) + 1):
+                self.cases.setdefault((i, j), []).append(element)
+
+    def retirer(self, element):
+        boite = self.boites.pop(element, None)
+        if boite is None:
+            return
+        for i in range(self.getCase(boite[0]), self.getCase(boite[2]) + 1):
+            for j in range(self.getCase(boite[1]), self.getCase(boite[3]) + 1):
+                self.cases[(i, j)].remove(element)
+
+    def contient(self, element):
+        return element in self.boites
+
+    def candidats(self, x1, y1, x2, y2):
+        candidats = set()
+        for i in range(self.getCase(x1), self.getCase(x2) + 1):
+            for j in range(self.getCase(y1), self.getCase(y2) + 1):
+                for element in self.cases.get((i, j), []):
+                    if element in candidats:
+                        continue
+                    boite = self.boites[element]
+                    if boite[0] <= x2 and boite[2] >= x1 and boite[1] <= y2 and boite[3] >= y1:
+                        candidats.add(element)
+        return candidats
+
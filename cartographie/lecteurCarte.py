@@ -1,5 +1,6 @@
 import xml.etree.ElementTree as ET
 import math
+import numpy
 from cartographie.cercle import Cercle
 from cartographie.polygone import Polygone
 from cartographie.rectangle import Rectangle
@@ -8,6 +9,61 @@ from cartographie.zoneEvitement import ZoneEvitement
 from cartographie.pointInteret import PointInteret
 import hashlib
 
+TOLERANCE_ARC = 4.0  # mm, an avoidance polygon is never further than this from the exact offset of the shape
+DECIMATION = 1.0  # mm, concave points closer than this to the line of their neighbours are dropped
+
+
+def decalerPolygone(xs, ys, distance, tolerance=TOLERANCE_ARC, decimation=DECIMATION):
+    # Outward offset of a polygon, given clockwise or not. A convex corner becomes an arc drawn as the polygon
+    # circumscribed to its circle, with the fewest points the tolerance allows, so the result never cuts into the
+    # exact offset. A concave corner is the meeting point of its two offset edges
+    points = numpy.column_stack([xs, ys]).astype(float)
+    points = points[numpy.any(points != numpy.roll(points, 1, axis=0), axis=1)]  # repeated points
+    if len(points) < 3:
+        return points[:, 0], points[:, 1]
+    suivants = numpy.roll(points, -1, axis=0)
+    sens = 1.0 if numpy.sum(points[:, 0] * suivants[:, 1] - suivants[:, 0] * points[:, 1]) > 0 else -1.0
+    aretes = suivants - points  # edge k goes from point k to point k+1
+    aretes /= numpy.hypot(aretes[:, 0], aretes[:, 1])[:, None]
+    normales = sens * numpy.column_stack([aretes[:, 1], -aretes[:, 0]])
+    n1 = numpy.roll(normales, 1, axis=0)  # edge arriving at each point
+    n2 = normales
+    a1 = numpy.arctan2(n1[:, 1], n1[:, 0])
+    virage = (numpy.arctan2(n2[:, 1], n2[:, 0]) - a1 + math.pi) % (2 * math.pi) - math.pi
+    convexe = sens * virage > 1e-9
+    pas = 2 * math.acos(distance / (distance + tolerance))
+    nbPoints = numpy.where(convexe, numpy.maximum(1, numpy.ceil(numpy.abs(virage) / pas)), 1).astype(int)
+    coin = numpy.repeat(numpy.arange(len(points)), nbPoints)
+    rang = numpy.arange(len(coin)) - numpy.repeat(numpy.cumsum(nbPoints) - nbPoints, nbPoints)
+    ecart = virage / nbPoints
+    angles = a1[coin] + ecart[coin] * (rang + 0.5)
+    rayons = distance / numpy.cos(ecart[coin] / 2)
+    resultat = points[coin] + rayons[:, None] * numpy.column_stack([numpy.cos(angles), numpy.sin(angles)])
+    concave = ~convexe[coin]
+    if numpy.any(concave):
+        # a point on both offset edges
+        produit = numpy.maximum(1 + numpy.sum(n1 * n2, axis=1), 0.1)
+        onglets = points + distance * (n1 + n2) / produit[:, None]
+        resultat[concave] = onglets[coin[concave]]
+    return decimer(resultat, sens, decimation)
+
+
+def decimer(points, sens, decimation):
+    # Drops the points whose removal only makes the polygon larger, by less than decimation
+    while len(points) > 3:
+        precedents = numpy.roll(points, 1, axis=0)
+        suivants = numpy.roll(points, -1, axis=0)
+        corde = suivants - precedents
+        longueur = numpy.maximum(numpy.hypot(corde[:, 0], corde[:, 1]), 1e-9)
+        ecart = sens * ((points[:, 0] - precedents[:, 0]) * corde[:, 1] - (points[:, 1] - precedents[:, 1]) * corde[:, 0]) / longueur
+        retirer = (ecart > -decimation - 1e-6) & (ecart < 1e-6)
+        retirer &= ~numpy.roll(retirer, 1)  # never two neighbours in the same pass
+        if not numpy.any(retirer):
+            break
+        points = points[~retirer]
+    return points[:, 0], points[:, 1]
+
+
 class LecteurCarte:
     distanceEvitement = 0
 
@@ -96,8 +152,7 @@ class LecteurCarte:
             return Rectangle(nom,x1,y1,x2,y2,couleur)
         elif forme.tag == "polygone":
             polygone = Polygone(nom, couleur)
-            for point in forme:
-                polygone.addPoint(float(point.get("x")), float(point.get("y")))
+            polygone.addPoints([(float(point.get("x")), float(point.get("y"))) for point in forme])
             return polygone
 
     def createZoneEvitement(self,forme):
@@ -114,57 +169,7 @@ class LecteurCarte:
             return self.createEvitementPolygone(forme)
 
     def createEvitementPolygone(self, forme):
+        xs, ys = decalerPolygone(forme.sommets[:, 0], forme.sommets[:, 1], self.distanceEvitement)
         polygone = Polygone("", "red")
-        precision = 5
-        newPoints=[]
-        #Creation des contour: eloignement des cotes
-        for i in range(0, len(forme.pointList)):
-            if i>0:
-                lastPoint = forme.pointList[i-1]
-            else:
-                lastPoint = forme.pointList[len(forme.pointList)-1]
-            point = forme.pointList[i]
-            lx = float(lastPoint["x"])
-            ly = float(lastPoint["y"])
-            x = float(point["x"])
-            y = float(point["y"])
-            dx = x-lx
-            dy = y-ly
-            dist = math.sqrt(pow(dx, 2) + pow(dy, 2))
-            newDist = self.distanceEvitement
-            dx *= -1
-            ax = lx + (newDist / dist) * dy
-            ay = ly + (newDist / dist) * dx
-            bx = x + (newDist / dist) * dy
-            by = y + (newDist / dist) * dx
-            newPoints.append([ax, ay])
-            newPoints.append([bx, by])
-        #Creation des contours des coins
-        for i in range(0, len(newPoints), 2):
-            if i>0:
-                lastPoint = newPoints[i-1]
-            else:
-                lastPoint = newPoints[len(newPoints)-1]
-            polyPoint = forme.pointList[i/2-1]
-            px = float(polyPoint["x"])
-            py = float(polyPoint["y"])
-            point = newPoints[i]
-            lx = float(lastPoint[0])
-            ly = float(lastPoint[1])
-            x = float(point[0])
-            y = float(point[1])
-            polygone.addPoint(lx, ly)
-            for p in range(1, precision+1):
-                f1=(1.0/float(precision+1))*(p)
-                f2=1 - f1
-                cx = (lx*f2 + x*f1) - px
-                cy = (ly*f2 + y*f1) - py
-                dist = math.sqrt(pow(cx, 2) + pow(cy, 2))
-                newDist = self.distanceEvitement
-                cx = (newDist / dist) * cx
-                cy = (newDist / dist) * cy
-                cx += px
-                cy += py
-                polygone.addPoint(cx, cy)
-            polygone.addPoint(x, y)
+        polygone.addPoints(zip(xs.tolist(), ys.tolist()))
         return ZoneEvitement(polygone)
@@ -16,6 +16,10 @@ class Ligne(Forme):
         self.x = (x1+x2)/2
         self.y = (y1+y2)/2
         self.couleur = couleur
+        self.calculerBoite()
+
+    def calculerBoite(self):
+        self.boite = (min(self.x1, self.x2), min(self.y1, self.y2), max(self.x1, self.x2), max(self.y1, self.y2))
 
     def setCouleur(self, newCouleur):
         self.couleur = newCouleur
@@ -73,12 +77,14 @@ class Ligne(Forme):
         longeur=self.getlongeur()
         self.x2=self.x1 + longeur*math.cos(radangle)
         self.y2=self.y1 + longeur*math.sin(radangle)
+        self.calculerBoite()
 
     def resize(self,size):
         #x1 and y1 should not change, only x2 and y2
         angle = self.getAngle()
         self.x2 = self.x1+size*math.cos(angle)
         self.y2 = self.y1+size*math.sin(angle)
+        self.calculerBoite()
 
     def toJson(self):
         str = u'{'
@@ -0,0 +1,83 @@
+import math
+import time
+
+from cartographie.cercle import Cercle
+from cartographie.pointInteret import PointInteret
+from cartographie.zoneEvitement import ZoneEvitement
+
+RAYON_OBSTACLE = 200     # mm, size given to an unknown detected object (opponent robot)
+DUREE_OBSTACLE = 2.0     # s, time to live of a detection
+DISTANCE_FUSION = 150    # mm, a detection closer than this to a live obstacle refreshes it
+MARGE_ROBOT = 20         # mm, the avoidance zone never swallows the robot that saw the obstacle
+NB_EMPLACEMENTS = 8      # obstacles live at once, the one expiring first is moved when they are all used
+
+
+# Temporary obstacles seen by the telemeters, added to the navigation graph as inflated circles.
+# They are merged cell by cell with ChercheurChemin.ajouterElement and removed the same way when they expire,
+# the map itself is never rebuilt. The PointInteret are a fixed pool of slots whose circles are moved to each new
+# detection, so the tables, the distance field and the masks of the graph keep the same size during the whole match.
+class ObstaclesDynamiques:
+
+    def __init__(self, chercheur, rayon=RAYON_OBSTACLE, duree=DUREE_OBSTACLE, nbEmplacements=NB_EMPLACEMENTS):
+        self.chercheur = chercheur
+        self.rayon = rayon
+        self.duree = duree
+        self.nbEmplacements = nbEmplacements
+        self.obstacles = []  # [PointInteret, expiration]
+        self.libres = []     # slots already created and not in use
+        self.compteur = 0
+
+    def ajouter(self, x, y, xRobot=None, yRobot=None):
+        maintenant = time.time()
+        self.nettoyer(maintenant)
+        for obstacle in self.obstacles:
+            forme = obstacle[0].forme
+            if math.hypot(forme.x - x, forme.y - y) < DISTANCE_FUSION:
+                obstacle[1] = maintenant + self.duree
+                return obstacle[0]
+        rayonEvitement = self.rayon + self.chercheur.largeurRobot
+        if xRobot is not None and yRobot is not None:
+            rayonEvitement = min(rayonEvitement, max(self.rayon, math.hypot(xRobot - x, yRobot - y) - MARGE_ROBOT))
+        point = self.prendreEmplacement()
+        self.placer(point.forme, x, y, self.rayon)
+        self.placer(point.zoneEvitement.forme, x, y, rayonEvitement)
+        self.chercheur.ajouterElement(point, False)
+        self.obstacles.append([point, maintenant + self.duree])
+        return point
+
+    def prendreEmplacement(self):
+        if len(self.libres) > 0:
+            return self.libres.pop()
+        if self.compteur < self.nbEmplacements:
+            self.compteur += 1
+            nom = "Obstacle dynamique " + str(self.compteur)
+            return PointInteret(nom, Cercle(nom, 0, 0, self.rayon, "purple"), None,
+                                ZoneEvitement(Cercle("", 0, 0, self.rayon, "purple")), 0, None, "obstacleDynamique", "")
+        obstacle = min(self.obstacles, key=lambda obstacle: obstacle[1])
+        self.chercheur.retirerElement(obstacle[0], False)
+        self.obstacles.remove(obstacle)
+        return obstacle[0]
+
+    def placer(self, cercle, x, y, rayon):
+        cercle.x = x
+        cercle.y = y
+        cercle.rayon = rayon
+        cercle.calculerBoite()
+
+    def nettoyer(self, maintenant=None):
+        if maintenant is None:
+            maintenant = time.time()
+        for obstacle in list(self.obstacles):
+            if obstacle[1] <= maintenant:
+                self.chercheur.retirerElement(obstacle[0], False)
+                self.obstacles.remove(obstacle)
+                self.libres.append(obstacle[0])
+
+    def vider(self):
+        for obstacle in self.obstacles:
+            self.chercheur.retirerElement(obstacle[0], False)
+            self.libres.append(obstacle[0])
+        self.obstacles = []
+
+    def getElements(self):
+        return [obstacle[0] for obstacle in self.obstacles]
@@ -1,3 +1,5 @@
+import numpy
+
 from cartographie.forme import *
 
 class Polygone(Forme):
@@ -7,11 +9,31 @@ class Polygone(Forme):
         self.y = 0.0
         self.pointList = []
         self.couleur = couleur
+        self.calculerBoite()
 
     def addPoint(self, x, y):
-        self.pointList.append({"x": x, "y": y})
-        self.x = (x + self.x * float(len(self.pointList)-1)) / float(len(self.pointList))
-        self.y = (y + self.y * float(len(self.pointList)-1)) / float(len(self.pointList))
+        self.addPoints([(x, y)])
+
+    def addPoints(self, points):
+        # sommets and the box are computed once for all the points given
+        for x, y in points:
+            self.pointList.append({"x": x, "y": y})
+            self.x = (x + self.x * float(len(self.pointList)-1)) / float(len(self.pointList))
+            self.y = (y + self.y * float(len(self.pointList)-1)) / float(len(self.pointList))
+        self.calculerBoite()
+
+    def calculerBoite(self):
+        # the points packed as floats in a (n, 2) array, read by the collision tests instead of pointList
+        self.sommets = numpy.array([[point["x"], point["y"]] for point in self.pointList], dtype=float).reshape(-1, 2)
+        # edges (point i, point i-1) as float tuples, walked by the collision tests without any allocation
+        points = self.sommets.tolist()
+        self.aretes = [(points[i][0], points[i][1], points[i - 1][0], points[i - 1][1]) for i in range(0, len(points))]
+        if len(self.pointList) == 0:
+            self.boite = None
+            return
+        xMin, yMin = self.sommets.min(axis=0).tolist()
+        xMax, yMax = self.sommets.max(axis=0).tolist()
+        self.boite = (xMin, yMin, xMax, yMax)
 
     def setCouleur(self, newCouleur):
         couleur = newCouleur
@@ -0,0 +1,278 @@
+import numpy
+
+from cartographie.graph import trouverPointLibre, elementsMasque, serialiserGraph
+from cartographie.grille import Grille
+
+NIVEAU_MAX = 5  # largest cells are 2^NIVEAU_MAX fine cells wide
+
+
+def aretesLabel(label, nbCellules):
+    # (start, end) leaves of every pair of 8-neighbour fine cells in different leaves, sorted and without duplicates
+    paires = [(label[:-1, :], label[1:, :]), (label[:, :-1], label[:, 1:]),
+              (label[:-1, :-1], label[1:, 1:]), (label[1:, :-1], label[:-1, 1:])]
+    debut = numpy.concatenate([a.ravel() for a, b in paires] + [b.ravel() for a, b in paires])
+    fin = numpy.concatenate([b.ravel() for a, b in paires] + [a.ravel() for a, b in paires])
+    differents = debut != fin
+    aretes = numpy.unique(debut[differents] * nbCellules + fin[differents])
+    return aretes // nbCellules, aretes % nbCellules
+
+
+# Adaptive navigation graph: the map is rasterised on a fine Grille, then square blocks of fine cells covered by
+# exactly the same elements are merged into one node, up to 2^NIVEAU_MAX cells wide. Cells stay fine along the
+# edges of the avoidance zones and become coarse in open space. Nodes are integer leaf indices, two leaves are
+# neighbours when two of their fine cells are 8-neighbours. getNoeudCase works on the fine cells, so the line of
+# sight of Theta* and the free point search keep the fine resolution.
+# Adding an element only splits the leaves it cuts, the ids of the other leaves never change (see ajouterElement).
+class Quadtree:
+
+    def __init__(self, largeur, longueur, step, niveauMax=NIVEAU_MAX):
+        self.step = step
+        self.niveauMax = niveauMax
+        self.fine = Grille(largeur, longueur, step)
+        self.nx = self.fine.nx
+        self.ny = self.fine.ny
+        self.partitionner()
+
+    def rasteriser(self, listePointInteret):
+        self.fine.rasteriser(listePointInteret)
+        self.partitionner()
+
+    def partitionner(self):
+        fine = self.fine
+        # one integer per distinct set of covering elements
+        lignes = numpy.ascontiguousarray(fine.masque).view(numpy.dtype((numpy.void, fine.masque.shape[1]))).ravel()
+        valeurs = numpy.unique(lignes, return_inverse=True)[1].reshape(self.nx, self.ny)
+        taille = 1
+        while taille < max(self.nx, self.ny):
+            taille *= 2
+        niveau = numpy.full((taille, taille), -1, dtype=numpy.int64)  # -1 outside the map, -2 mixed block
+        niveau[:self.nx, :self.ny] = valeurs
+        niveaux = [niveau]
+        for l in range(1, self.niveauMax + 1):
+            if niveau.shape[0] == 1:
+                break
+            a = niveau[0::2, 0::2]
+            uniforme = (a >= 0) & (a == niveau[1::2, 0::2]) & (a == niveau[0::2, 1::2]) & (a == niveau[1::2, 1::2])
+            niveau = numpy.where(uniforme, a, -2)
+            niveaux.append(niveau)
+        # leaves from the coarsest level down: uniform blocks not inside a larger leaf
+        label = numpy.full((taille, taille), -1, dtype=numpy.int64)
+        couvert = None
+        xs = []
+        ys = []
+        cellules = []
+        blocs = []
+        nbFeuilles = 0
+        for l in range(len(niveaux) - 1, -1, -1):
+            uniforme = niveaux[l] >= 0
+            if couvert is None:
+                feuilles = uniforme
+            else:
+                couvert = couvert.repeat(2, axis=0).repeat(2, axis=1)
+                feuilles = uniforme & ~couvert
+            couvert = feuilles if couvert is None else couvert | feuilles
+            bi, bj = numpy.nonzero(feuilles)
+            if len(bi) == 0:
+                continue
+            cote = 1 << l
+            index = numpy.full(feuilles.shape, -1, dtype=numpy.int64)
+            index[bi, bj] = numpy.arange(nbFeuilles, nbFeuilles + len(bi))
+            etendu = index.repeat(cote, axis=0).repeat(cote, axis=1)
+            label = numpy.where(etendu >= 0, etendu, label)
+            xs.append((bi * cote + (cote - 1) / 2.0) * self.step)
+            ys.append((bj * cote + (cote - 1) / 2.0) * self.step)
+            cellules.append(bi * cote * self.ny + bj * cote)  # a fine cell of the leaf, to read its elements
+            blocs.extend(zip((bi * cote).tolist(), (bj * cote).tolist(), [cote] * len(bi)))
+            nbFeuilles += len(bi)
+        self.label = label[:self.nx, :self.ny]
+        self.labelListe = self.label.tolist()
+        self.nbCellules = nbFeuilles
+        self.xs = numpy.concatenate(xs)
+        self.ys = numpy.concatenate(ys)
+        self.positions = zip(self.xs.tolist(), self.ys.tolist())
+        self.masque = fine.masque[numpy.concatenate(cellules)]
+        self.blocs = blocs  # (ix, iy, side) of the first fine cell of each leaf
+        self.meres = range(0, nbFeuilles)  # leaf each leaf was split from, itself for the leaves of the partition
+        self.construireVoisins()
+        self._libresCle = None
+        self._libres = None
+        self.recherche = 0
+        self.visite = [0] * self.nbCellules
+        self.pere = [None] * self.nbCellules
+        self.recherchePere = [0] * self.nbCellules
+        self.nettoyer()
+
+    def construireVoisins(self):
+        debut, fin = aretesLabel(self.label, self.nbCellules)
+        indptr = numpy.zeros(self.nbCellules + 1, dtype=numpy.int64)
+        indptr[1:] = numpy.cumsum(numpy.bincount(debut, minlength=self.nbCellules))
+        indptr = indptr.tolist()
+        indices = fin.tolist()
+        self.voisins = [indices[indptr[i]:indptr[i + 1]] for i in range(0, self.nbCellules)]
+
+    def relierFeuilles(self, modifiees, i1, j1, i2, j2):
+        # neighbours of the leaves split in the fine block [i1, i2) x [j1, j2): every leaf touching them holds a fine
+        # cell of the block grown by one cell, the neighbours of the other leaves do not change
+        debut, fin = aretesLabel(self.label[max(i1 - 1, 0):i2 + 1, max(j1 - 1, 0):j2 + 1], self.nbCellules)
+        listes = dict((feuille, []) for feuille in modifiees)
+        for a, b in zip(debut.tolist(), fin.tolist()):
+            if a not in modifiees and b not in modifiees:
+                continue
+            if a not in listes:
+                listes[a] = [voisin for voisin in self.voisins[a] if voisin not in modifiees]
+            listes[a].append(b)
+        for feuille, voisins in listes.items():
+            self.voisins[feuille] = sorted(voisins)
+
+    def toCache(self):
+        indptr = numpy.zeros(self.nbCellules + 1, dtype=numpy.int64)
+        indptr[1:] = numpy.cumsum([len(voisins) for voisins in self.voisins])
+        indices = numpy.array([voisin for voisins in self.voisins for voisin in voisins], dtype=numpy.int64)
+        return {"xs": self.xs, "ys": self.ys, "indptr": indptr, "indices": indices,
+                "masque": self.masque, "elements": [element.getID() for element in self.fine.elements]}
+
+    def serialize(self, hash):
+        return serialiserGraph(self, hash)
+
+    def getElements(self, feuille):
+        return elementsMasque(self.masque, self.fine.elements, feuille)
+
+    def getNoeuds(self):
+        return range(0, self.nbCellules)
+
+    def getNoeudsFenetre(self, boite):
+        return numpy.unique(self.label.ravel()[self.fine.getFenetre(boite)]).tolist()
+
+    def retirerElement(self, element, boite=None):
+        # clearing a bit keeps every leaf uniform, no need to merge them again
+        index = self.fine.indexElement.get(element)
+        if index is None:
+            return
+        self.fine.retirerElement(element, boite)
+        feuilles = slice(None) if boite is None else self.getNoeudsFenetre(boite)
+        self.masque[feuilles, index >> 3] &= numpy.uint8(~(1 << (index & 7)) & 0xFF)
+        self._libresCle = None
+
+    def ajouterElement(self, element, boite):
+        # The new shape may cut leaves: the fine grid is updated in its window and only the leaves of the window that
+        # are no longer uniform are split. The first block of a split leaf keeps its id, the others get new ids at the
+        # end, so the ids held by the callers stay valid. Leaves are never merged back, the count only grows
+        fine = self.fine
+        fine.ajouterElement(element, boite)
+        if fine.masque.shape[1] > self.masque.shape[1]:
+            colonnes = numpy.zeros((self.nbCellules, fine.masque.shape[1] - self.masque.shape[1]), dtype=numpy.uint8)
+            self.masque = numpy.hstack([self.masque, colonnes])
+        masque = fine.masque.reshape(self.nx, self.ny, -1)
+        coupees = []
+        etendues = []
+        nouveaux = []
+        for feuille in self.getNoeudsFenetre(boite):
+            ix, iy, cote = self.blocs[feuille]
+            blocs = self.decouper(masque, ix, iy, cote)
+            self.masque[feuille] = masque[ix, iy]
+            if len(blocs) == 1:
+                continue
+            coupees.append(feuille)
+            etendues.append((ix, iy, cote))
+            for bloc in blocs:
+                nouveaux.append((feuille, bloc))
+        if len(coupees) == 0:
+            self._libresCle = None
+            return
+        premier = set()
+        ajoutes = []
+        for feuille, (ix, iy, cote) in nouveaux:
+            if feuille in premier:
+                nouvelle = self.nbCellules + len(ajoutes)
+                ajoutes.append((feuille, ix, iy, cote))
+            else:
+                premier.add(feuille)
+                nouvelle = feuille
+                self.blocs[feuille] = (ix, iy, cote)
+                self.positions[feuille] = ((ix + (cote - 1) / 2.0) * self.step, (iy + (cote - 1) / 2.0) * self.step)
+                self.masque[feuille] = masque[ix, iy]
+            self.label[ix:ix + cote, iy:iy + cote] = nouvelle
+            for i in range(ix, ix + cote):
+                self.labelListe[i][iy:iy + cote] = [nouvelle] * cote
+        self.blocs.extend([(ix, iy, cote) for feuille, ix, iy, cote in ajoutes])
+        self.meres.extend([feuille for feuille, ix, iy, cote in ajoutes])
+        self.positions.extend([((ix + (cote - 1) / 2.0) * self.step, (iy + (cote - 1) / 2.0) * self.step)
+                               for feuille, ix, iy, cote in ajoutes])
+        self.masque = numpy.vstack([self.masque, numpy.array([masque[ix, iy] for feuille, ix, iy, cote in ajoutes])])
+        self.nbCellules += len(ajoutes)
+        self.xs = numpy.array([x for x, y in self.positions])
+        self.ys = numpy.array([y for x, y in self.positions])
+        self.voisins.extend([[] for bloc in ajoutes])
+        self.visite.extend([0] * len(ajoutes))
+        self.pere.extend([None] * len(ajoutes))
+        self.recherchePere.extend([0] * len(ajoutes))
+        modifiees = set(coupees) | set(range(self.nbCellules - len(ajoutes), self.nbCellules))
+        self.relierFeuilles(modifiees, min([ix for ix, iy, cote in etendues]), min([iy for ix, iy, cote in etendues]),
+                            max([ix + cote for ix, iy, cote in etendues]), max([iy + cote for ix, iy, cote in etendues]))
+        self._libresCle = None
+
+    def decouper(self, masque, ix, iy, cote):
+        # uniform blocks covering the fine block of a leaf, the leaf itself when the new element did not cut it
+        bloc = masque[ix:ix + cote, iy:iy + cote]
+        if cote == 1 or (bloc == bloc[0, 0]).all():
+            return [(ix, iy, cote)]
+        moitie = cote // 2
+        blocs = []
+        for dx, dy in [(0, 0), (moitie, 0), (0, moitie), (moitie, moitie)]:
+            blocs.extend(self.decouper(masque, ix + dx, iy + dy, moitie))
+        return blocs
+
+    def getFeuilleMere(self, feuille):
+        return self.meres[feuille]
+
+    def estLibre(self, feuille, blockingElements):
+        cle = frozenset(blockingElements)
+        if cle != self._libresCle:
+            autorises = self.fine.getMasqueElements(blockingElements)
+            self._libres = (~numpy.any(self.masque & ~autorises, axis=1)).tolist()
+            self._libresCle = cle
+        return self._libres[feuille]
+
+    def getPosition(self, feuille):
+        return self.positions[feuille]
+
+    def getNoeudCase(self, ix, iy):
+        if 0 <= ix < self.nx and 0 <= iy < self.ny:
+            return self.labelListe[ix][iy]
+        return None
+
+    def trouverPointProche(self, x, y, blockingElements=None):
+        ix = min(max(int(round(float(x) / self.step)), 0), self.nx - 1)
+        iy = min(max(int(round(float(y) / self.step)), 0), self.ny - 1)
+        return trouverPointLibre(self, x, y, self.labelListe[ix][iy], blockingElements)
+
+    def getVoisin(self, feuille):
+        return self.voisins[feuille]
+
+    def dessiner(self, fenetre):
+        size = 5
+        occupe = numpy.any(self.masque != 0, axis=1)
+        for feuille in range(0, self.nbCellules):
+            x, y = self.getPosition(feuille)
+            color = "purple" if occupe[feuille] else "black"
+            fenetre.drawLine("", x-size, y-size, x+size, y+size, color)
+            fenetre.drawLine("", x+size, y-size, x-size, y+size, color)
+
+    def marquer(self, feuille):
+        self.visite[feuille] = self.recherche
+
+    def estMaquer(self, feuille):
+        return self.visite[feuille] == self.recherche
+
+    def setPere(self, feuille, pere):
+        self.pere[feuille] = pere
+        self.recherchePere[feuille] = self.recherche
+
+    def getPere(self, feuille):
+        if self.recherchePere[feuille] != self.recherche:
+            return None
+        return self.pere[feuille]
+
+    def nettoyer(self):
+        # a new search number, the marks and parents of the previous searches no longer count
+        self.recherche += 1
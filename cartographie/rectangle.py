@@ -10,6 +10,10 @@ class Rectangle(Forme):
         self.x = (x1+x2)/2
         self.y = (y1+y2)/2
         self.couleur = couleur
+        self.calculerBoite()
+
+    def calculerBoite(self):
+        self.boite = (min(self.x1, self.x2), min(self.y1, self.y2), max(self.x1, self.x2), max(self.y1, self.y2))
 
     def setCouleur(self, newCouleur):
         couleur = newCouleur
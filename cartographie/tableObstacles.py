@@ -0,0 +1,216 @@
+import numpy
+
+from cartographie.cercle import Cercle
+from cartographie.rectangle import Rectangle
+from cartographie.polygone import Polygone
+from cartographie.ligne import Ligne
+
+
+def intersections(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2):
+    # Collision.collisionLigneLigne on broadcast arrays
+    s10_x = ax2 - ax1
+    s10_y = ay2 - ay1
+    s32_x = bx2 - bx1
+    s32_y = by2 - by1
+    denom = s10_x * s32_y - s32_x * s10_y
+    denomPositive = denom > 0
+    s02_x = ax1 - bx1
+    s02_y = ay1 - by1
+    s_numer = s10_x * s02_y - s10_y * s02_x
+    t_numer = s32_x * s02_y - s32_y * s02_x
+    collision = (denom != 0) & ((s_numer < 0) != denomPositive) & ((t_numer < 0) != denomPositive)
+    collision &= ((s_numer > denom) != denomPositive) & ((t_numer > denom) != denomPositive)
+    return collision
+
+
+def pointsContenus(forme, xs, ys):
+    # Collision.contenuDans on arrays of points, even-odd rule for the polygons
+    if isinstance(forme, Cercle):
+        return (xs - forme.x) ** 2 + (ys - forme.y) ** 2 <= forme.rayon ** 2
+    if isinstance(forme, Rectangle):
+        return (forme.x1 <= xs) & (forme.x2 >= xs) & (forme.y1 <= ys) & (forme.y2 >= ys)
+    contenu = numpy.zeros(len(xs), dtype=bool)
+    if isinstance(forme, Polygone):
+        # one crossing test per edge for all the points at once
+        points = forme.sommets.tolist()
+        for i in range(0, len(points)):
+            ax, ay = points[i - 1]
+            bx, by = points[i]
+            if ay == by:
+                continue
+            traverse = (ay > ys) != (by > ys)
+            xCroisement = ax + (ys - ay) * (bx - ax) / (by - ay)
+            contenu ^= traverse & (xs < xCroisement)
+    return contenu
+
+
+# Every shape of the map packed into NumPy arrays: the edges of rectangles and polygones, centre and radius of circles.
+# A query tests one or many segments against all of them at once, with the same rules as Collision.collisionEntre(ligne, forme).
+class TableObstacles:
+
+    def __init__(self, listePointInteret, evitement=True):
+        self.evitement = evitement
+        self.elements = []
+        self.index = {}
+        self.segments = []  # [ax1, ay1, ax2, ay2, element, segmentFirst]
+        self.cercles = []   # [x, y, rayon, element]
+        self.rectangles = []  # [x1, y1, x2, y2, element], for the points held
+        self.aretes = []    # [ax, ay, bx, by, element], edges of the polygons one after the other, for the points held
+        self.compile = False
+        for point in listePointInteret:
+            self.ajouter(point)
+
+    def getForme(self, point):
+        if self.evitement:
+            return point.zoneEvitement.forme
+        return point.forme
+
+    def ajouter(self, point):
+        # a point already packed takes its shape again, it may have moved (slots of the dynamic obstacles)
+        indice = self.index.get(point)
+        if indice is None:
+            indice = len(self.elements)
+            self.index[point] = indice
+            self.elements.append(point)
+        else:
+            self.retirerForme(indice)
+        forme = self.getForme(point)
+        if isinstance(forme, Cercle):
+            self.cercles.append([forme.x, forme.y, forme.rayon, indice])
+        elif isinstance(forme, Rectangle):
+            # same edges and argument order as Collision.collisionRectangleLigne
+            self.segments.append([forme.x1, forme.y1, forme.x2, forme.y1, indice, True])
+            self.segments.append([forme.x1, forme.y2, forme.x2, forme.y2, indice, True])
+            self.segments.append([forme.x1, forme.y1, forme.x1, forme.y2, indice, True])
+            self.segments.append([forme.x2, forme.y1, forme.x2, forme.y2, indice, True])
+            self.rectangles.append([forme.x1, forme.y1, forme.x2, forme.y2, indice])
+        elif isinstance(forme, Polygone):
+            # same edges and argument order as Collision.collisionPolygoneLigne
+            sommets = forme.sommets.tolist()
+            for i in range(1, len(sommets)):
+                self.segments.append(sommets[i] + sommets[i - 1] + [indice, False])
+            self.segments.append(sommets[0] + sommets[-1] + [indice, False])
+            if len(sommets) > 2:
+                for i in range(0, len(sommets)):
+                    self.aretes.append(sommets[i - 1] + sommets[i] + [indice])
+        elif isinstance(forme, Ligne):
+            self.segments.append([forme.x1, forme.y1, forme.x2, forme.y2, indice, True])
+        self.compile = False
+
+    def retirerForme(self, indice):
+        # the edges of a polygon stay together at the end of aretes, as numpy.add.reduceat needs
+        self.segments = [segment for segment in self.segments if segment[4] != indice]
+        self.cercles = [cercle for cercle in self.cercles if cercle[3] != indice]
+        self.rectangles = [rectangle for rectangle in self.rectangles if rectangle[4] != indice]
+        self.aretes = [arete for arete in self.aretes if arete[4] != indice]
+
+    def contient(self, point):
+        return point in self.index
+
+    def compiler(self):
+        # edges tested as collisionLigneLigne(query, edge), then as collisionLigneLigne(edge, query)
+        self.segmentsFirst = self.compilerSegments([segment for segment in self.segments if segment[5]])
+        self.segmentsSecond = self.compilerSegments([segment for segment in self.segments if not segment[5]])
+        cercles = numpy.array([cercle[0:3] for cercle in self.cercles], dtype=float).reshape(-1, 3)
+        self.cx, self.cy, rayons = cercles.T
+        self.rayonCarre = rayons * rayons
+        self.cercleElement = numpy.array([cercle[3] for cercle in self.cercles], dtype=int)
+        rectangles = numpy.array([rectangle[0:4] for rectangle in self.rectangles], dtype=float).reshape(-1, 4)
+        self.rx1, self.ry1, self.rx2, self.ry2 = rectangles.T
+        self.rectangleElement = numpy.array([rectangle[4] for rectangle in self.rectangles], dtype=int)
+        aretes = numpy.array([arete[0:4] for arete in self.aretes], dtype=float).reshape(-1, 4)
+        self.ax, self.ay, self.bx, self.by = aretes.T
+        self.horizontales = self.ay == self.by
+        self.pente = (self.bx - self.ax) / numpy.where(self.horizontales, 1.0, self.by - self.ay)
+        areteElement = numpy.array([arete[4] for arete in self.aretes], dtype=int)
+        # first edge of each polygon, for the crossing count of numpy.add.reduceat
+        self.debutsPolygone = numpy.nonzero(numpy.r_[True, areteElement[1:] != areteElement[:-1]])[0] if len(areteElement) > 0 else areteElement
+        self.polygoneElement = areteElement[self.debutsPolygone]
+        self.centreX = numpy.array([point.forme.x for point in self.elements], dtype=float)
+        self.centreY = numpy.array([point.forme.y for point in self.elements], dtype=float)
+        self.compile = True
+
+    def compilerSegments(self, segments):
+        tableau = numpy.array([segment[0:4] for segment in segments], dtype=float).reshape(-1, 4)
+        element = numpy.array([segment[4] for segment in segments], dtype=int)
+        return tableau[:, 0], tableau[:, 1], tableau[:, 2], tableau[:, 3], element
+
+    def getMasque(self, listePointInteret):
+        masque = numpy.zeros(len(self.elements), dtype=bool)
+        for point in listePointInteret:
+            indice = self.index.get(point)
+            if indice is not None:
+                masque[indice] = True
+        return masque
+
+    def collisions(self, x1, y1, x2, y2):
+        # x1, y1, x2, y2: arrays of M segments. Returns the (M, nbElements) hit mask
+        if not self.compile:
+            self.compiler()
+        x1 = numpy.asarray(x1, dtype=float)[:, None]
+        y1 = numpy.asarray(y1, dtype=float)[:, None]
+        x2 = numpy.asarray(x2, dtype=float)[:, None]
+        y2 = numpy.asarray(y2, dtype=float)[:, None]
+        touche = numpy.zeros((x1.shape[0], len(self.elements)), dtype=bool)
+        sx1, sy1, sx2, sy2, element = self.segmentsFirst
+        if len(element) > 0:
+            lignes, colonnes = numpy.nonzero(intersections(x1, y1, x2, y2, sx1, sy1, sx2, sy2))
+            touche[lignes, element[colonnes]] = True
+        sx1, sy1, sx2, sy2, element = self.segmentsSecond
+        if len(element) > 0:
+            lignes, colonnes = numpy.nonzero(intersections(sx1, sy1, sx2, sy2, x1, y1, x2, y2))
+            touche[lignes, element[colonnes]] = True
+        if len(self.cercles) > 0:
+            # Collision.collisionCercleLigne: distance from the centre to the segment
+            dx = x2 - x1
+            dy = y2 - y1
+            longueurCarre = dx * dx + dy * dy
+            t = ((self.cx - x1) * dx + (self.cy - y1) * dy) / numpy.where(longueurCarre > 0, longueurCarre, 1.0)
+            t = numpy.clip(t, 0.0, 1.0)
+            ex = x1 + t * dx - self.cx
+            ey = y1 + t * dy - self.cy
+            lignes, colonnes = numpy.nonzero(ex * ex + ey * ey <= self.rayonCarre)
+            touche[lignes, self.cercleElement[colonnes]] = True
+        if len(self.rectangles) > 0 or len(self.aretes) > 0:
+            # solid shapes: a segment crossing no edge still collides when it lies inside a rectangle or a polygon
+            touche |= self.contenus(x1[:, 0], y1[:, 0])
+        return touche
+
+    def contenus(self, xs, ys, bloc=4096):
+        # xs, ys: arrays of N points. Returns the (N, nbElements) mask of the shapes holding each point, with the
+        # rules of Collision.contenuDans and the even-odd rule for the polygons, convex or not. Points are
+        # classified bloc at a time to bound the memory used by the polygon edges
+        if not self.compile:
+            self.compiler()
+        xs = numpy.asarray(xs, dtype=float)
+        ys = numpy.asarray(ys, dtype=float)
+        contenu = numpy.zeros((len(xs), len(self.elements)), dtype=bool)
+        for debut in range(0, len(xs), bloc):
+            x = xs[debut:debut + bloc, None]
+            y = ys[debut:debut + bloc, None]
+            resultat = contenu[debut:debut + bloc]
+            if len(self.cercleElement) > 0:
+                resultat[:, self.cercleElement] |= (x - self.cx) ** 2 + (y - self.cy) ** 2 <= self.rayonCarre
+            if len(self.rectangleElement) > 0:
+                resultat[:, self.rectangleElement] |= (self.rx1 <= x) & (self.rx2 >= x) & (self.ry1 <= y) & (self.ry2 >= y)
+            if len(self.polygoneElement) > 0:
+                traverse = ((self.ay > y) != (self.by > y)) & ~self.horizontales
+                croise = traverse & (x < self.ax + (y - self.ay) * self.pente)
+                croisements = numpy.add.reduceat(croise.astype(numpy.int32), self.debutsPolygone, axis=1)
+                resultat[:, self.polygoneElement] |= (croisements & 1).astype(bool)
+        return contenu
+
+    def premiereCollision(self, x1, y1, x2, y2, masque=None):
+        # For each segment, the element hit closest to its start (same order as ChercheurChemin.enCollisionCarte), or None
+        touche = self.collisions(x1, y1, x2, y2)
+        if masque is not None:
+            touche &= masque
+        resultat = []
+        for i in range(0, touche.shape[0]):
+            indices = numpy.nonzero(touche[i])[0]
+            if len(indices) == 0:
+                resultat.append(None)
+                continue
+            distance = (self.centreX[indices] - x1[i]) ** 2 + (self.centreY[indices] - y1[i]) ** 2
+            resultat.append(self.elements[indices[numpy.argmin(distance)]])
+        return resultat, touche
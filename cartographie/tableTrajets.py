@@ -0,0 +1,278 @@
+import heapq
+import math
+import os
+import pickle
+
+import numpy
+
+from cartographie.tableObstacles import pointsContenus
+from cartographie.indexSpatial import boiteEnglobante
+from cartographie.ligne import Ligne
+
+VITESSE_MOYENNE = 400.0  # mm/s, turns the path lengths into durations
+VERSION = 2  # 2: avoidance polygons from decalerPolygone
+INFINI = float("inf")
+
+
+# Travel distances and durations between every access zone of the map and the starting positions.
+# Each point keeps a Dijkstra distance field over the navigation graph. The distance between two points is the
+# min-plus product of their fields: each half of the path may cross the elements containing its own end, like
+# trouverChemin does with its blocking elements. A free direct line gives the euclidean distance instead.
+class TableTrajets:
+
+    def __init__(self, chercheur, vitesse=VITESSE_MOYENNE):
+        self.chercheur = chercheur
+        self.vitesse = float(vitesse)
+        self.ids = []
+        self.points = []
+        self.indexPoint = {}
+        self.blocages = []
+        self.champs = None
+        self.matrice = None
+        self.directes = None
+        self.perimes = set()
+        self.retires = set()
+        self.depart = None  # (key, field) of the last position asked by getTrajetDepuis from inside an element
+
+    def ajouterPoint(self, id, x, y):
+        if id in self.indexPoint:
+            return
+        self.indexPoint[id] = len(self.ids)
+        self.ids.append(id)
+        self.points.append((float(x), float(y)))
+
+    def indexerNoeuds(self):
+        self.noeuds = self.chercheur.graph.getNoeuds()
+        self.indexNoeud = {}
+        for i, noeud in enumerate(self.noeuds):
+            self.indexNoeud[noeud] = i
+        liste = self.chercheur.listePointInteret
+        contenu = self.chercheur.pointsContenus([x for x, y in self.points], [y for x, y in self.points], liste)
+        self.blocages = [[liste[i] for i in numpy.nonzero(elements)[0]] for elements in contenu]
+
+    def calculer(self):
+        self.indexerNoeuds()
+        self.champs = numpy.array([self.calculerChamp(k) for k in range(0, len(self.ids))], dtype=float).reshape(len(self.ids), len(self.noeuds))
+        self.matrice = numpy.zeros((len(self.ids), len(self.ids)))
+        self.directes = numpy.zeros((len(self.ids), len(self.ids)), dtype=bool)
+        for k in range(0, len(self.ids)):
+            for j in range(k, len(self.ids)):
+                self.directes[k, j] = self.directes[j, k] = self.ligneDirecte(k, j)
+        for k in range(0, len(self.ids)):
+            self.calculerLigne(k)
+        self.perimes = set()
+
+    def calculerChamp(self, k):
+        x, y = self.points[k]
+        return self.champDepuis(x, y, self.blocages[k])
+
+    def champDepuis(self, x, y, blockingElements):
+        # distance field from a position, the elements containing it can be crossed
+        graph = self.chercheur.graph
+        champ = [INFINI] * len(self.noeuds)
+        depart = graph.trouverPointProche(x, y, blockingElements)
+        if depart is None or not graph.estLibre(depart, blockingElements):
+            return champ
+        px, py = graph.getPosition(depart)
+        champ[self.indexNoeud[depart]] = math.hypot(px - x, py - y)
+        self.propager(champ, [depart], blockingElements)
+        return champ
+
+    def propager(self, champ, graines, blockingElements):
+        # Dijkstra from the seeds with their current distance, only decreases the field
+        graph = self.chercheur.graph
+        compteur = 0
+        ouverts = []
+        for noeud in graines:
+            compteur += 1
+            ouverts.append((champ[self.indexNoeud[noeud]], compteur, noeud))
+        heapq.heapify(ouverts)
+        while len(ouverts) > 0:
+            distance, c, currentNode = heapq.heappop(ouverts)
+            if distance > champ[self.indexNoeud[currentNode]]:
+                continue  # stale heap entry
+            xCourant, yCourant = graph.getPosition(currentNode)
+            for noeud in graph.getVoisin(currentNode):
+                if not graph.estLibre(noeud, blockingElements):
+                    continue
+                x, y = graph.getPosition(noeud)
+                nouvelleDistance = distance + math.hypot(x - xCourant, y - yCourant)
+                i = self.indexNoeud[noeud]
+                if nouvelleDistance < champ[i]:
+                    champ[i] = nouvelleDistance
+                    compteur += 1
+                    heapq.heappush(ouverts, (nouvelleDistance, compteur, noeud))
+
+    def calculerLigne(self, k):
+        ligne = (self.champs[k][None, :] + self.champs).min(axis=1)
+        x1, y1 = self.points[k]
+        for j in numpy.nonzero(self.directes[k])[0]:
+            x2, y2 = self.points[j]
+            ligne[j] = math.hypot(x2 - x1, y2 - y1)
+        self.matrice[k, :] = ligne
+        self.matrice[:, k] = ligne
+
+    def ligneDirecte(self, k, j):
+        x1, y1 = self.points[k]
+        x2, y2 = self.points[j]
+        return self.estLibre(x1, y1, x2, y2, set(self.blocages[k]) | set(self.blocages[j]))
+
+    def estLibre(self, x1, y1, x2, y2, blockingElements):
+        # the removed elements may still be in the list until the caller drops them
+        notBlockingElements = [element for element in self.chercheur.listePointInteret
+                               if element not in blockingElements and element not in self.retires]
+        return not self.chercheur.enCollisionCarte(Ligne("", x1, y1, x2, y2), notBlockingElements)
+
+    def actualiserDirectes(self, boite, directes):
+        # only the direct lines crossing the bounding box of the changed element can change
+        for k in range(0, len(self.ids)):
+            x1, y1 = self.points[k]
+            for j in range(k + 1, len(self.ids)):
+                x2, y2 = self.points[j]
+                if self.directes[k, j] != directes:
+                    continue
+                if min(x1, x2) > boite[2] or max(x1, x2) < boite[0] or min(y1, y2) > boite[3] or max(y1, y2) < boite[1]:
+                    continue
+                self.directes[k, j] = self.directes[j, k] = self.ligneDirecte(k, j)
+
+    def actualiser(self, k):
+        if k in self.perimes:
+            self.perimes.discard(k)
+            self.champs[k] = self.calculerChamp(k)
+            self.calculerLigne(k)
+
+    def suivreGraph(self):
+        # the quadtree splits the leaves cut by a new element: a new leaf takes the distances of the leaf it comes from
+        graph = self.chercheur.graph
+        nouveaux = range(len(self.noeuds), len(graph.getNoeuds()))
+        if len(nouveaux) == 0:
+            return
+        champs = numpy.empty((len(self.ids), len(self.noeuds) + len(nouveaux)))
+        champs[:, :len(self.noeuds)] = self.champs
+        for noeud in nouveaux:
+            i = len(self.noeuds)
+            champs[:, i] = champs[:, self.indexNoeud[graph.getFeuilleMere(noeud)]]
+            self.indexNoeud[noeud] = i
+            self.noeuds.append(noeud)
+        self.champs = champs
+        self.depart = None
+
+    def retirerElement(self, element):
+        # distances can only decrease: the freed cells are relaxed from their neighbours and the decrease is propagated
+        graph = self.chercheur.graph
+        boite = boiteEnglobante(element.zoneEvitement.forme)
+        fenetre = graph.getNoeudsFenetre(boite)
+        self.retires.add(element)
+        for k in range(0, len(self.ids)):
+            if element in self.blocages[k]:
+                self.blocages[k] = [blocage for blocage in self.blocages[k] if blocage is not element]
+            if k in self.perimes:
+                continue
+            champ = self.champs[k].tolist()
+            graines = []
+            for noeud in fenetre:
+                if not graph.estLibre(noeud, self.blocages[k]):
+                    continue
+                i = self.indexNoeud[noeud]
+                x, y = graph.getPosition(noeud)
+                for voisin in graph.getVoisin(noeud):
+                    vx, vy = graph.getPosition(voisin)
+                    distance = champ[self.indexNoeud[voisin]] + math.hypot(vx - x, vy - y)
+                    if distance < champ[i]:
+                        champ[i] = distance
+                if champ[i] < INFINI:
+                    graines.append(noeud)
+            self.propager(champ, graines, self.blocages[k])
+            self.champs[k] = champ
+        self.actualiserDirectes(boite, False)
+        for k in range(0, len(self.ids)):
+            if k not in self.perimes:
+                self.calculerLigne(k)
+
+    def ajouterElement(self, element):
+        # distances can only increase, the fields reaching the new obstacle are recomputed when they are used
+        self.retires.discard(element)
+        boite = boiteEnglobante(element.zoneEvitement.forme)
+        fenetre = [self.indexNoeud[noeud] for noeud in self.chercheur.graph.getNoeudsFenetre(boite)]
+        contenu = pointsContenus(element.zoneEvitement.forme, numpy.array([x for x, y in self.points]), numpy.array([y for x, y in self.points]))
+        for k in range(0, len(self.ids)):
+            if contenu[k]:
+                self.blocages[k].append(element)
+                self.perimes.add(k)
+            elif numpy.any(self.champs[k][fenetre] < INFINI):
+                self.perimes.add(k)
+        self.actualiserDirectes(boite, True)
+        for k in range(0, len(self.ids)):
+            if k not in self.perimes:
+                self.calculerLigne(k)
+
+    def getTrajet(self, idDepart, idArrivee):
+        k = self.indexPoint[idDepart]
+        j = self.indexPoint[idArrivee]
+        self.actualiser(k)
+        self.actualiser(j)
+        distance = self.matrice[k, j]
+        return distance, distance / self.vitesse
+
+    def getTrajetDepuis(self, x, y, idArrivee):
+        # From any position: the field of the arrival gives the distance from the nearest node. That field treats the
+        # elements containing the position as obstacles, so from inside one of them the distance is the min-plus
+        # product with a field of the position, like calculerLigne does between two points of the table
+        j = self.indexPoint[idArrivee]
+        self.actualiser(j)
+        x2, y2 = self.points[j]
+        blockingElements = [element for element in self.chercheur.pointContenuListe(x, y, self.chercheur.listePointInteret)
+                            if element not in self.retires]
+        if self.estLibre(x, y, x2, y2, set(blockingElements) | set(self.blocages[j])):
+            distance = math.hypot(x2 - x, y2 - y)
+        elif len(blockingElements) > 0:
+            distance = float(numpy.min(self.getChampDepart(x, y, blockingElements) + self.champs[j]))
+        else:
+            graph = self.chercheur.graph
+            noeud = graph.trouverPointProche(x, y, blockingElements)
+            if noeud is None:
+                distance = INFINI
+            else:
+                px, py = graph.getPosition(noeud)
+                distance = self.champs[j][self.indexNoeud[noeud]] + math.hypot(px - x, py - y)
+        return distance, distance / self.vitesse
+
+    def getChampDepart(self, x, y, blockingElements):
+        # the objectives are compared from the same position, its field is kept while the map does not change
+        cle = (x, y, frozenset(blockingElements), self.chercheur.versionCarte)
+        if self.depart is None or self.depart[0] != cle:
+            self.depart = (cle, numpy.array(self.champDepuis(x, y, blockingElements)))
+        return self.depart[1]
+
+    def sauvegarder(self, fichier, mapHash):
+        dossier = os.path.dirname(fichier)
+        if dossier and not os.path.isdir(dossier):
+            os.makedirs(dossier)
+        cache = {"version": VERSION, "mapHash": mapHash, "ids": self.ids, "points": self.points,
+                 "nbNoeuds": len(self.noeuds), "champs": self.champs, "matrice": self.matrice, "directes": self.directes}
+        tmpFichier = fichier + ".tmp"
+        with open(tmpFichier, "wb") as file:
+            pickle.dump(cache, file, 2)
+        if os.path.isfile(fichier):
+            os.remove(fichier)
+        os.rename(tmpFichier, fichier)
+        return True
+
+    def charger(self, fichier, mapHash):
+        if not os.path.isfile(fichier):
+            return False
+        try:
+            with open(fichier, "rb") as file:
+                cache = pickle.load(file)
+        except Exception:
+            return False
+        self.indexerNoeuds()
+        if cache.get("version") != VERSION or cache.get("mapHash") != mapHash or cache.get("nbNoeuds") != len(self.noeuds):
+            return False
+        if cache["ids"] != self.ids or cache["points"] != self.points:
+            return False
+        self.champs = cache["champs"]
+        self.matrice = cache["matrice"]
+        self.directes = cache["directes"]
+        self.perimes = set()
+        return True
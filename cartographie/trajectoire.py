@@ -0,0 +1,153 @@
+import math
+
+from cartographie.chercheurChemin import ecartAngle
+from cartographie.ligne import Ligne
+
+RAYON_VIRAGE = 150.0            # mm, largest radius used to round a corner
+RAYON_MIN = 30.0                # mm, a tighter corner is driven with a stop
+PAS_ARC = 30.0                  # deg, between two points of an arc
+VITESSE_MAX = 1000.0            # mm/s, reached with a speed of 1.0
+ACCELERATION = 800.0            # mm/s2, along the path
+ACCELERATION_LATERALE = 600.0   # mm/s2, limits the speed in the turns
+VITESSE_MIN = 0.1               # smallest speed sent for a point the base drives through
+LIGNE_MAX = 300.0               # mm, a longer straight line gets a point in its middle to reach a higher speed
+
+
+class PointTrajectoire:
+
+    def __init__(self, x, y, angle, sens, rayon=None):
+        self.x = x
+        self.y = y
+        self.angle = angle  # heading of the robot at this point
+        self.sens = sens    # 1 forward, -1 backward, to reach this point
+        self.rayon = rayon  # radius of the arc holding the point, 0 for a stop, None on a straight line
+        self.speed = 0.0
+
+
+# Smoothed path streamed to MovingBase.startMovementPath.
+# The corners of the path found by ChercheurChemin are replaced by circular arcs tangent to both lines, as large as
+# the lines and the map allow: an arc that hits an element is tried again with half its radius, down to RAYON_MIN.
+# The robot stops where it switches between forward and backward (same rule as Robot.seDeplacerXY) and on the
+# corners that can't be rounded. Each point gets the speed of a trapezoidal profile bounded by the lateral
+# acceleration in the arcs, the base drives through the points with a speed and stops on the points with none.
+class Trajectoire:
+
+    def __init__(self, chercheur, chemin, listePointInteret, angleDepart, angleArrivee=None, vitesse=1.0):
+        self.chercheur = chercheur
+        self.vitesse = vitesse
+        x1, y1 = chemin[0].x1, chemin[0].y1
+        x2, y2 = chemin[-1].x2, chemin[-1].y2
+        blockingElements = chercheur.pointContenuListe(x1, y1, listePointInteret) + chercheur.pointContenuListe(x2, y2, listePointInteret)
+        self.obstacles = [element for element in list(listePointInteret) + chercheur.obstaclesDynamiques.getElements()
+                          if element not in blockingElements]
+        self.depart = (x1, y1)
+        self.points = []
+        self.lisser([ligne for ligne in chemin if ligne.getlongeur() > 0], angleDepart, angleArrivee)
+        self.decouperLignes()
+        self.calculerVitesses()
+
+    def lisser(self, chemin, angleDepart, angleArrivee):
+        directions = []
+        caps = []
+        sens = []
+        cap = angleDepart
+        for ligne in chemin:
+            direction = math.degrees(math.atan2(ligne.y2 - ligne.y1, ligne.x2 - ligne.x1))
+            s = 1
+            if cap is not None and ecartAngle(cap, direction) > 90:
+                s = -1
+            cap = direction + (180.0 if s < 0 else 0.0)
+            directions.append(direction)
+            caps.append(cap)
+            sens.append(s)
+        for k in range(1, len(chemin)):
+            x, y = chemin[k].x1, chemin[k].y1
+            if sens[k] != sens[k - 1]:
+                self.points.append(PointTrajectoire(x, y, caps[k], sens[k - 1], 0))
+                continue
+            angle = ecartAngle(directions[k - 1], directions[k])
+            if angle < 1:
+                continue  # aligned lines
+            if not self.ajouterArc(chemin[k - 1], chemin[k], angle, sens[k]):
+                self.points.append(PointTrajectoire(x, y, caps[k], sens[k], 0))
+        angle = caps[-1] if angleArrivee is None else angleArrivee
+        self.points.append(PointTrajectoire(chemin[-1].x2, chemin[-1].y2, angle, sens[-1], 0))
+
+    def ajouterArc(self, ligne1, ligne2, angle, sens):
+        x, y = ligne1.x2, ligne1.y2
+        ux1, uy1 = (ligne1.x2 - ligne1.x1) / ligne1.getlongeur(), (ligne1.y2 - ligne1.y1) / ligne1.getlongeur()
+        ux2, uy2 = (ligne2.x2 - ligne2.x1) / ligne2.getlongeur(), (ligne2.y2 - ligne2.y1) / ligne2.getlongeur()
+        cote = 1 if ux1 * uy2 - uy1 * ux2 > 0 else -1  # 1 when turning left
+        demiAngle = math.radians(angle) / 2.0
+        # the tangent points stay on the first half of each line
+        rayon = min(RAYON_VIRAGE, min(ligne1.getlongeur(), ligne2.getlongeur()) / 2.0 / math.tan(demiAngle))
+        nbPas = int(math.ceil(angle / PAS_ARC))
+        while rayon >= RAYON_MIN:
+            tangente = rayon * math.tan(demiAngle)
+            xDebut, yDebut = x - ux1 * tangente, y - uy1 * tangente
+            xCentre, yCentre = xDebut - cote * uy1 * rayon, yDebut + cote * ux1 * rayon
+            depart = math.atan2(yDebut - yCentre, xDebut - xCentre)
+            arc = []
+            for i in range(0, nbPas + 1):
+                a = depart + cote * math.radians(angle) * i / nbPas
+                direction = math.degrees(math.atan2(uy1, ux1)) + cote * angle * i / nbPas
+                arc.append(PointTrajectoire(xCentre + rayon * math.cos(a), yCentre + rayon * math.sin(a),
+                                            direction + (180.0 if sens < 0 else 0.0), sens, rayon))
+            if not self.enCollision(arc):
+                self.points.extend(arc)
+                return True
+            rayon /= 2.0
+        return False
+
+    def enCollision(self, arc):
+        for i in range(1, len(arc)):
+            if self.chercheur.enCollisionCarte(Ligne("", arc[i - 1].x, arc[i - 1].y, arc[i].x, arc[i].y), self.obstacles):
+                return True
+        return False
+
+    def decouperLignes(self):
+        # the base drives to a point at the speed of this point
+        points = []
+        x, y = self.depart
+        for point in self.points:
+            if math.hypot(point.x - x, point.y - y) > LIGNE_MAX:
+                angle = math.degrees(math.atan2(point.y - y, point.x - x)) + (180.0 if point.sens < 0 else 0.0)
+                points.append(PointTrajectoire((x + point.x) / 2.0, (y + point.y) / 2.0, angle, point.sens))
+            points.append(point)
+            x, y = point.x, point.y
+        self.points = points
+
+    def calculerVitesses(self):
+        # forward pass for the acceleration, backward pass for the braking, in mm/s
+        vitesseMax = self.vitesse * VITESSE_MAX
+        limites = []
+        for point in self.points:
+            if point.rayon == 0:
+                limites.append(0.0)
+            elif point.rayon is None:
+                limites.append(vitesseMax)
+            else:
+                limites.append(min(vitesseMax, math.sqrt(ACCELERATION_LATERALE * point.rayon)))
+        distances = []
+        x, y = self.depart
+        for point in self.points:
+            distances.append(math.hypot(point.x - x, point.y - y))
+            x, y = point.x, point.y
+        vitesses = list(limites)
+        precedente = 0.0  # the robot starts from a stop
+        for i in range(0, len(vitesses)):
+            vitesses[i] = min(vitesses[i], math.sqrt(precedente ** 2 + 2 * ACCELERATION * distances[i]))
+            precedente = vitesses[i]
+        for i in range(len(vitesses) - 2, -1, -1):
+            vitesses[i] = min(vitesses[i], math.sqrt(vitesses[i + 1] ** 2 + 2 * ACCELERATION * distances[i + 1]))
+        for point, vitesse, limite in zip(self.points, vitesses, limites):
+            point.speed = 0.0 if limite == 0 else max(VITESSE_MIN, vitesse / VITESSE_MAX)
+
+    def getPoints(self):
+        return self.points
+
+    def dessiner(self, fenetre):
+        x, y = self.depart
+        for point in self.points:
+            Ligne("", x, y, point.x, point.y, "green").dessiner(fenetre)
+            x, y = point.x, point.y
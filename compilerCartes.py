@@ -0,0 +1,82 @@
+import argparse
+import glob
+import os
+import time
+import xml.etree.ElementTree as ET
+
+from cartographie.depotCartes import depot
+from cartographie.chercheurChemin import ChercheurChemin
+from intelligence.position import Position
+
+# Offline map compiler: builds the graph cache, with the distance field of the avoidance zones, and the travel table
+# of every (map, robot, grid step) in graphCache/, the robot then only loads them at startup.
+# Run from the repository root and copy graphCache/ on the robot:
+#   python compilerCartes.py                              every map of cartes/ for every robot of robots/, step 40
+#   python compilerCartes.py -c cartes/carte_2019_GoodEnough.xml -r robots/robotGoodEnough.xml -s 40 20
+#   python compilerCartes.py --force                      rebuild even when the cache files are valid
+
+
+def lireRobot(fichier):
+    # width and starting positions only, LecteurRobot needs the boards to be importable
+    root = ET.parse(fichier).getroot()
+    listPosition = []
+    for position in root.findall("position"):
+        listPosition.append(Position(position.get("nom"), position.get("couleur"), float(position.get("x")),
+                                     float(position.get("y")), float(position.get("angle"))))
+    return os.path.basename(fichier), float(root.get("rayon")), listPosition
+
+
+def supprimer(fichier):
+    if os.path.isfile(fichier):
+        os.remove(fichier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile the graph caches and travel tables of the maps")
+    parser.add_argument("-c", "--cartes", nargs="+", default=sorted(glob.glob("cartes/*.xml")))
+    parser.add_argument("-r", "--robots", nargs="+", default=sorted(glob.glob("robots/*.xml")))
+    parser.add_argument("-s", "--steps", nargs="+", type=int, default=[40], help="grid steps in mm")
+    parser.add_argument("-f", "--force", action="store_true", help="delete the existing cache files first")
+    arguments = parser.parse_args()
+
+    robots = []
+    for fichier in arguments.robots:
+        try:
+            robots.append(lireRobot(fichier))
+        except Exception as e:
+            print fichier, "can't be read:", e
+    resultats = []
+    for fichier in arguments.cartes:
+        try:
+            carte = depot.getCarte(fichier)
+        except Exception as e:
+            print fichier, "can't be read:", e
+            continue
+        if carte is None:
+            print fichier, "can't be read"
+            continue
+        for nom, largeur, listPosition in robots:
+            listePointInteret = carte.nouvellePartie(largeur)
+            for step in arguments.steps:
+                t = time.time()
+                chercheur = ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, step=step, largeurRobot=largeur)
+                if arguments.force and chercheur.graphCharge:
+                    supprimer(chercheur.graphFile)
+                    chercheur = ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, step=step, largeurRobot=largeur)
+                dureeGraph = time.time() - t
+                t = time.time()
+                if arguments.force:
+                    supprimer(chercheur.getFichierTrajets(listPosition))
+                chercheur.initialiserTrajets(listPosition)
+                dureeTrajets = time.time() - t
+                resultats.append((os.path.basename(fichier), nom, largeur, step, len(chercheur.graph.getNoeuds()),
+                                  "loaded" if chercheur.graphCharge else "built", dureeGraph,
+                                  "loaded" if chercheur.trajetsCharges else "built", dureeTrajets))
+    print "\n{:<28} {:<22} {:>6} {:>5} {:>7} {:<7} {:>8} {:<7} {:>8}".format(
+        "map", "robot", "width", "step", "nodes", "graph", "s", "table", "s")
+    for resultat in resultats:
+        print "{:<28} {:<22} {:>6.0f} {:>5} {:>7} {:<7} {:>8.3f} {:<7} {:>8.3f}".format(*resultat)
+
+
+if __name__ == "__main__":
+    main()
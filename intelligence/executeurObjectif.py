@@ -1,4 +1,3 @@
-from cartographie.lecteurCarte import LecteurCarte
 from cartographie.chercheurChemin import ChercheurChemin
 from intelligence.lecteurObjectif import LecteurObjectif
 from intelligence.robot import Robot
@@ -40,17 +39,16 @@ class ExecuteurObjectif:
         self.fenetre = fenetre
         self.score = 0
 
-        chercher = chercheurChemin
+        self.chercher = chercheurChemin
         lecteurObjectif = LecteurObjectif(self.fichierObjectifs, robot, self.matchDuration)
 
-
-        carte = LecteurCarte(self.fichierCarte, robot.largeur)
-
-        self.listePointInteret  = carte.lire()
+        # same list as the pathfinding and the robot, the map is not read again
+        self.listePointInteret = chercheurChemin.listePointInteret
         if lecteurObjectif.tree is not None:
             self.listeObjectifs = lecteurObjectif.lire()
         else:
             self.listeObjectifs = []
+        self.trierObjectifs = lecteurObjectif.trierParValeur()
 
     def selectionnerObjectif(self, listObjectif):
         listPossible = []
@@ -60,13 +58,41 @@ class ExecuteurObjectif:
                     return objectif
             elif objectif.isPossible():
                 listPossible.append(objectif)
-        listPossibleOrdered = sorted(listPossible, key=lambda objetcif: objectif.estimateValue())
-        for objectif in listPossibleOrdered:
+        for objectif in self.ordonnerObjectifs(listPossible):
             if objectif.nom == "Funny Action":
                 continue
             return objectif
         return None
 
+    def ordonnerObjectifs(self, listObjectif):
+        # File order, unless the objectif file asks to sort by value: the objectifs with an estimate then swap their
+        # places by value (file order on ties), the ones without points keep their place
+        if not self.trierObjectifs:
+            return listObjectif
+        valeurs = [objectif.estimateValue(self.getTravelDuration(objectif)) for objectif in listObjectif]
+        places = [i for i, valeur in enumerate(valeurs) if valeur is not None]
+        listOrdered = list(listObjectif)
+        for place, i in zip(places, sorted(places, key=lambda i: valeurs[i])):
+            listOrdered[place] = listObjectif[i]
+        return listOrdered
+
+    def getTravelDuration(self, objectif):
+        # Duration from the current position to the first element the objectif moves to, 0 if unknown
+        for action in objectif.getActions():
+            if action.couleur != '' and action.couleur != self.robot.couleur:
+                continue
+            if action.methode != "seDeplacerVersUnElement":
+                continue
+            tabParam = [param.getValue() for param in action.tabParametres]
+            element = self.robot.trouverElement(tabParam[0], tabParam[2] if len(tabParam) > 2 else None)
+            if element == None or self.chercher == None:
+                return 0.0
+            trajet = self.chercher.getTrajet(self.robot.x, self.robot.y, element)
+            if trajet == None:
+                return 0.0
+            return trajet[1]
+        return 0.0
+
     def executerObjectifs(self):
         #thread de funny Action
         self.funnyThread = Thread(target=waitForFunnyAction, args=(self,))
@@ -1,4 +1,3 @@
-from cartographie.lecteurCarte import LecteurCarte
 from cartographie.chercheurChemin import ChercheurChemin
 from intelligence.lecteurObjectif import LecteurObjectif
 from intelligence.robot import Robot
@@ -37,9 +36,9 @@ class ExecuteurObjectif:
 
         chercher = chercheurChemin
         lecteurObjectif = LecteurObjectif(self.fichierObjectifs, robot, self.matchDuration)
-        carte = LecteurCarte(self.fichierCarte, robot.largeur)
 
-        self.listePointInteret  = carte.lire()
+        # same list as the pathfinding and the robot, the map is not read again
+        self.listePointInteret = chercheurChemin.listePointInteret
         self.listeObjectifs = lecteurObjectif.lire()
 
     def executerObjectifs(self):
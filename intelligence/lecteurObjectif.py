@@ -28,6 +28,10 @@ class LecteurObjectif:
                     listeObjectifs.append(self.__getObjectif(child))
         return listeObjectifs
 
+    def trierParValeur(self):
+        # <listeObjectif tri="valeur"> sorts the objectifs by Objectif.estimateValue, the file order is kept otherwise
+        return self.tree is not None and self.tree.getroot().get("tri") == "valeur"
+
     def __getObjectif(self,objectif):
         nom = objectif.get("nom")
         points = int(objectif.get("points"))
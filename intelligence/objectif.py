@@ -56,10 +56,11 @@ class Objectif:
     def getDuration(self):
         return self.temp
 
-    def estimateValue(self):
-        if float(self.getDuration()) == 0 or float(self.getPoints()) == 0:
-            return 0.0
-        return float(self.getDuration()) / float(self.getPoints())
+    def estimateValue(self, travelDuration=0.0):
+        # seconds per point, lower is better. None without points: the objectif can't be compared with the others
+        if float(self.getPoints()) == 0:
+            return None
+        return (float(self.getDuration()) + travelDuration) / float(self.getPoints())
 
     def isPossible(self):
         for condition in self.tabConditions:
@@ -3,7 +3,8 @@ import time
 
 from cartographie.cercle import Cercle
 from cartographie.ligne import Ligne
-from boards.movingBase import MovingBase
+from cartographie.trajectoire import Trajectoire
+from boards.movingBase import MovingBase, PATH_MAX_LENGTH
 from webInterface.interface import RunningState
 import webInterface
 
@@ -33,6 +34,7 @@ class Robot:
         self.movingDALastDist = 0
         self.movingDALastAngle = 0
         self.movingXY = False
+        self.pathIndex = None
         self.startTime = time.time()
         self.matchDuration = 0
         self.objectifEnCours = None
@@ -97,6 +99,7 @@ class Robot:
         if self.isSimulated:
             self.movingBase = MovingBase("dummyBase","movingBase","")
             self.movingBase._isXYSupported = True
+            self.movingBase._isPathSupported = True
         return self.isSimulated
 
     def setPosition(self, x, y, angle):
@@ -265,6 +268,7 @@ class Robot:
                     #lineTarget.dessiner(self.fenetre)
                     telemetre.color = "purple"
                     print("/!\\"+telemetre.nom+" detected Unkown object. Position "+str(lineTarget.x2)+","+str(lineTarget.y2)+", angle "+str(lineTarget.getAngle())+ " at distance "+str(telemetre.value))
+                    self.chercher.ajouterObstacleDynamique(lineTarget.x2, lineTarget.y2, self.x, self.y)
                     return [lineTarget.x2, lineTarget.y2]
                 else:
                     telemetre.color = "blue"
@@ -337,7 +341,7 @@ class Robot:
         print "\t \t Deplacement: x:{:.2f} y:{:.2f} angel:{:.2f}".format(x, y, absoluteAngle)
         chemin = None
         if not forceStraight:
-            chemin = self.chercher.trouverChemin(self.x,self.y,x,y,self.listPointInteret)
+            chemin = self.chercher.trouverChemin(self.x,self.y,x,y,self.listPointInteret,self.angle,absoluteAngle)
         else:
             chemin = []
             chemin.append(Ligne("",self.x,self.y,x,y))
@@ -346,6 +350,10 @@ class Robot:
             #if self.fenetre:
             #    Ligne("", self.x, self.y, x, y, "red").dessiner(self.fenetre)
             return False
+        if len(chemin) > 1 and self.movingBase and self.movingBase.isPathSupported():
+            trajectoire = Trajectoire(self.chercher, chemin, self.listPointInteret, self.angle, absoluteAngle, vitesse)
+            if len(trajectoire.getPoints()) <= PATH_MAX_LENGTH:
+                return self.suivreTrajectoire(trajectoire, x, y, absoluteAngle)
         for i in range(0,len(chemin)):
             ligne = chemin[i]
             if self.fenetre:
@@ -393,6 +401,31 @@ class Robot:
         else:
             return True
 
+    def suivreTrajectoire(self, trajectoire, x, y, absoluteAngle):
+        # the whole smoothed path is sent to the base, which drives through the corners without stopping
+        points = trajectoire.getPoints()
+        if self.fenetre:
+            trajectoire.dessiner(self.fenetre)
+        print "\t \t trajectory of {} points".format(len(points))
+        if self.telemetreDetectCollision(points[0].sens):
+            print "\t \t DeplacementXY failed"
+            return False
+        if self.isSimulated:
+            for i, point in enumerate(points):
+                if i > 0 and self.telemetreDetectCollision(point.sens):
+                    print "\t \t DeplacementXY failed"
+                    return False
+                if self.simulateMovement(point.x, point.y, point.angle, point.sens) is False:
+                    return False
+            return True
+        if not self.movingBase.startMovementPath(points) or not self.__waitForMovementFinished(True, pathMove=True):
+            print "\t \t DeplacementXY failed"
+            return False
+        res = self.positionAtteinte(x, y, absoluteAngle, self.x, self.y, self.angle, 50, 5)
+        if not res:
+            print "\t \t Position non atteinte"
+        return res
+
     def seDeplacerDistanceAngle(self,distance,angle,vitesse=1.0, retry=1, forceLine=False):
         print "\t \tDeplacement: distance:", str(distance), " angle:", str(angle)
 
@@ -420,17 +453,27 @@ class Robot:
         else:
             return False
 
-    def __waitForMovementFinished(self, xyMove, rotationOnly=False, doNotAvoid=False):
+    def __getMovementStatus(self, pathMove):
+        if not pathMove:
+            return self.movingBase.getMovementStatus()
+        status, index = self.movingBase.getMovementPathStatus()
+        if index is not None and index != self.pathIndex:
+            print "\t \t path point", index
+            self.pathIndex = index
+        return status
+
+    def __waitForMovementFinished(self, xyMove, rotationOnly=False, doNotAvoid=False, pathMove=False):
         errorObstacle = False
         errorStuck = False
         errorOutOfTime = False
         time.sleep(0.1)  #wait 100ms before getting information on the movment
         print "\t \t waiting"
-        status = self.movingBase.getMovementStatus()
+        self.pathIndex = None
+        status = self.__getMovementStatus(pathMove)
         print "\t \t " + status
         while "running" in status:
             self.updatePosition()
-            status = self.movingBase.getMovementStatus()
+            status = self.__getMovementStatus(pathMove)
             if not rotationOnly:
                 collision = self.telemetreDetectCollision()
                 if type(collision) != bool:
@@ -453,6 +496,9 @@ class Robot:
                 errorOutOfTime = True
                 break
             time.sleep(0.1)
+        if "disconnected" in status:
+            print "\t \t Moving base disconnected"
+            return False
         if "stuck" in status:
             errorStuck = True
             print "\t \t Stuck, stopping movement"
@@ -558,15 +604,17 @@ class Robot:
         else:
             self.speed = self.movingBase.getSpeed()
 
-    def seDeplacerVersUnElement(self,type,vitesse=1,couleur=None):
-        element = None
+    def trouverElement(self,type,couleur=None):
         if couleur==None:
             couleur = self.couleur
         #recherche de l'objet
         for obj in self.listPointInteret:
             if obj.type == type and (obj.couleur == couleur or obj.couleur not in [self.listPosition[0].couleur, self.listPosition[1].couleur]):
-                element = obj
-                break
+                return obj
+        return None
+
+    def seDeplacerVersUnElement(self,type,vitesse=1,couleur=None):
+        element = self.trouverElement(type, couleur)
         if element == None:
             print "\t \tElement non trouve!!!!" + type
             return False
@@ -579,24 +627,20 @@ class Robot:
 
 
     def retirerElementCarte(self,type,couleur=None):
-        element = None
-        if couleur==None:
-            couleur = self.couleur
-        #recherche de l'objet
-        for obj in self.listPointInteret:
-            if obj.type == type and (obj.couleur == couleur or obj.couleur not in [self.listPosition[0].couleur, self.listPosition[1].couleur]):
-                element = obj
-                break
+        element = self.trouverElement(type, couleur)
         if element == None:
             print "Element",type ," non trouve!!!!"
             return True
-        self.chercher.updateNodesRemovingElement(element, self.listPointInteret)
+        self.chercher.retirerElement(element)
         self.listPointInteret.remove(element)
         if webInterface.instance:
             webInterface.instance.removeMapElement(element)
         if self.fenetre:
+            # the shapes are shared with the other users of the map, only drawn in white
+            couleur = element.zoneEvitement.forme.couleur
             element.zoneEvitement.forme.couleur = "white"
             element.zoneEvitement.dessiner(self.fenetre)
+            element.zoneEvitement.forme.couleur = couleur
             self.fenetre.win.redraw()
         return True
 
@@ -28,7 +28,7 @@ def startIA():
     import intelligence
     import robots
 
-    from cartographie.lecteurCarte import LecteurCarte
+    from cartographie.depotCartes import depot
     from cartographie.chercheurChemin import ChercheurChemin
     from intelligence.robot import Robot
     from intelligence.lecteurRobot import LecteurRobot
@@ -71,8 +71,11 @@ def startIA():
 
     # creation du lecteur de carte
     print "Reading map file"
-    carte = LecteurCarte(fichierCarte, robot.largeur)
-    listePointInteret = carte.lire()  # chargement de la carte
+    carte = depot.getCarte(fichierCarte)
+    if carte is None:
+        print "ERROR: Can't find map file"
+        return
+    listePointInteret = carte.nouvellePartie(robot.largeur)  # chargement de la carte
     if len(listePointInteret) == 0:
         print "ERROR: Empty map"
         return
@@ -90,7 +93,17 @@ def startIA():
 
     # creation du pathfinding
     print "Initializing pathfinding"
-    chercher = ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, fenetre)
+    # on the robot the graph and the travel table must come from graphCache/, building them there is too slow
+    construire = not robotConnected
+    chercher = ChercheurChemin(carte.getTaille(), carte.getHash(), listePointInteret, fenetre, largeurRobot=robot.largeur,
+                               construire=construire)
+    if chercher.graphCharge or construire:
+        chercher.initialiserTrajets(robot.listPosition, construire=construire)
+    if not chercher.graphCharge or not chercher.trajetsCharges:
+        if robotConnected:
+            print "ERROR: map not precompiled for this robot, run python compilerCartes.py and copy graphCache/"
+            return
+        print "WARNING: map not precompiled for this robot, run python compilerCartes.py and copy graphCache/"
     if drawGraph:
         chercher.graph.dessiner(fenetre)
 
@@ -0,0 +1,123 @@
+import math
+import random
+import sys
+
+import numpy
+
+from cartographie.ligne import Ligne
+from cartographie.cercle import Cercle
+from cartographie.rectangle import Rectangle
+from cartographie.pointInteret import PointInteret
+from cartographie.collison import Collision, distanceSegmentCarre
+from cartographie.tableObstacles import TableObstacles, pointsContenus
+from benchCollision import CollisionCordes, cercleAleatoire, ligneAleatoire, rectangleAleatoire, polygoneAleatoire
+
+# Randomized check of the collision kernels, exit code 1 on any mismatch:
+# - every collision seen by the previous chord approximation is seen by the exact kernels, and a segment/circle
+#   collision it missed lies between the chords and the arc,
+# - Collision and TableObstacles agree on segments against circles, rectangles and polygons, inside ones included,
+# - circle/rectangle and polygon/circle agree with a reference written from distances to the edges.
+# Run from the repository root: python verifierCollision.py [tirages]
+
+APOTHEME = math.cos(math.pi / 9)  # the old kernel approximated circles with a 9 sided polygon
+
+
+def ligneProche(forme):
+    # segment around a shape, often inside it or crossing its border
+    boite = forme.boite
+    largeur = boite[2] - boite[0]
+    hauteur = boite[3] - boite[1]
+    points = [(random.uniform(boite[0] - 0.2 * largeur, boite[2] + 0.2 * largeur),
+               random.uniform(boite[1] - 0.2 * hauteur, boite[3] + 0.2 * hauteur)) for i in range(0, 2)]
+    return Ligne("", points[0][0], points[0][1], points[1][0], points[1][1])
+
+
+def verifierCordes(exact, cordes, tirages):
+    erreurs = 0
+    for i in range(0, tirages):
+        cercle = cercleAleatoire()
+        ligne = ligneProche(cercle) if random.random() < 0.3 else ligneAleatoire()
+        resultat = exact.collisionCercleLigne(cercle, ligne)
+        reference = cordes.collisionCercleLigne(cercle, ligne)
+        if reference and not resultat:
+            erreurs += 1  # the inscribed polygon is inside the disk
+        elif resultat and not reference:
+            # only allowed between the chords and the arc, or when the segment is inside the disk
+            rayonInterieur = cercle.rayon * APOTHEME * 0.999
+            distanceMin = math.sqrt(distanceSegmentCarre(cercle.x, cercle.y, ligne.x1, ligne.y1, ligne.x2, ligne.y2))
+            dedans = max(math.hypot(ligne.x1 - cercle.x, ligne.y1 - cercle.y), math.hypot(ligne.x2 - cercle.x, ligne.y2 - cercle.y)) <= cercle.rayon
+            if distanceMin < rayonInterieur and not dedans:
+                erreurs += 1
+    for genererForme in [rectangleAleatoire, polygoneAleatoire]:
+        for i in range(0, tirages):
+            forme = genererForme()
+            cercle = cercleAleatoire()
+            if cordes.collisionEntre(forme, cercle) and not exact.collisionEntre(forme, cercle):
+                erreurs += 1
+    return erreurs
+
+
+def verifierTable(exact, tirages):
+    # the same segments against one shape through Collision and through TableObstacles
+    erreurs = 0
+    for genererForme in [cercleAleatoire, rectangleAleatoire, polygoneAleatoire]:
+        for i in range(0, tirages // 10):
+            forme = genererForme()
+            table = TableObstacles([PointInteret("", forme, None, None, 0, None, "", "")], False)
+            lignes = [ligneProche(forme) for j in range(0, 10)]
+            touche = table.collisions([ligne.x1 for ligne in lignes], [ligne.y1 for ligne in lignes],
+                                      [ligne.x2 for ligne in lignes], [ligne.y2 for ligne in lignes])[:, 0]
+            for ligne, resultat in zip(lignes, touche):
+                if exact.collisionEntre(ligne, forme) != bool(resultat):
+                    erreurs += 1
+    return erreurs
+
+
+def distanceAretes(cercle, aretes):
+    # smallest distance from the centre of the circle to the edges (ax, ay, bx, by), numpy version
+    ax, ay, bx, by = numpy.array(aretes, dtype=float).T
+    dx = bx - ax
+    dy = by - ay
+    t = numpy.clip(((cercle.x - ax) * dx + (cercle.y - ay) * dy) / numpy.maximum(dx * dx + dy * dy, 1e-12), 0.0, 1.0)
+    return numpy.hypot(ax + t * dx - cercle.x, ay + t * dy - cercle.y).min()
+
+
+def verifierReference(exact, tirages):
+    erreurs = 0
+    for i in range(0, tirages):
+        rectangle = rectangleAleatoire()
+        cercle = cercleAleatoire()
+        aretes = [(rectangle.x1, rectangle.y1, rectangle.x2, rectangle.y1), (rectangle.x2, rectangle.y1, rectangle.x2, rectangle.y2),
+                  (rectangle.x2, rectangle.y2, rectangle.x1, rectangle.y2), (rectangle.x1, rectangle.y2, rectangle.x1, rectangle.y1)]
+        centreDedans = rectangle.x1 <= cercle.x <= rectangle.x2 and rectangle.y1 <= cercle.y <= rectangle.y2
+        reference = centreDedans or distanceAretes(cercle, aretes) <= cercle.rayon
+        if exact.collisionEntre(rectangle, cercle) != reference:
+            erreurs += 1
+    for i in range(0, tirages):
+        polygone = polygoneAleatoire()
+        cercle = cercleAleatoire()
+        centreDedans = pointsContenus(polygone, numpy.array([cercle.x]), numpy.array([cercle.y]))[0]
+        reference = bool(centreDedans) or distanceAretes(cercle, polygone.aretes) <= cercle.rayon
+        if exact.collisionEntre(polygone, cercle) != reference:
+            erreurs += 1
+    return erreurs
+
+
+def main():
+    tirages = 20000
+    if len(sys.argv) > 1:
+        tirages = int(sys.argv[1])
+    random.seed(2019)
+    exact = Collision()
+    erreurs = 0
+    for nom, verifier in [("chord approximation", lambda: verifierCordes(exact, CollisionCordes(), tirages)),
+                          ("TableObstacles", lambda: verifierTable(exact, tirages)),
+                          ("distance reference", lambda: verifierReference(exact, tirages))]:
+        nombre = verifier()
+        print "{:<20} {} mismatches".format(nom, nombre)
+        erreurs += nombre
+    return erreurs
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)